@@ -0,0 +1,134 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# "local" keeps chat routing inside this process; "redis" shares it between workers and nodes
+CHAT_BROKER = os.getenv('CHAT_BROKER', 'local')
+CHAT_BROKER_URL = os.getenv('CHAT_BROKER_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+CHAT_BROKER_PREFIX = os.getenv('CHAT_BROKER_PREFIX', 'stupid-be:chat:')
+# Backoff between attempts to resubscribe after the broker connection drops
+CHAT_BROKER_RETRY_MIN_S = float(os.getenv('CHAT_BROKER_RETRY_MIN_S', '0.5'))
+CHAT_BROKER_RETRY_MAX_S = float(os.getenv('CHAT_BROKER_RETRY_MAX_S', '30'))
+
+class Broker(ABC):
+    """
+    Pub/sub transport for chat routing. Every subscribed worker receives every
+    message, including its own, through the handler passed to start().
+    """
+
+    @abstractmethod
+    async def start(self, handler):
+        """Subscribe to every channel, delivering each message as handler(channel, message)."""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: dict):
+        """Send message to every subscribed worker."""
+
+    async def stop(self):
+        pass
+
+class LocalHub:
+    def __init__(self):
+        self.brokers = []
+
+class LocalBroker(Broker):
+    """
+    In-process broker. Brokers created on the same LocalHub behave like separate
+    workers attached to one shared bus, which is how tests stand in for Redis.
+    """
+
+    def __init__(self, hub: LocalHub = None):
+        self.hub = hub or LocalHub()
+        self.handler = None
+
+    async def start(self, handler):
+        self.handler = handler
+        if self not in self.hub.brokers:
+            self.hub.brokers.append(self)
+
+    async def publish(self, channel: str, message: dict):
+        # Round-trip through JSON so local delivery sees what a real broker would
+        payload = json.loads(json.dumps(message))
+        for broker in list(self.hub.brokers):
+            await broker.handler(channel, payload)
+
+    async def stop(self):
+        if self in self.hub.brokers:
+            self.hub.brokers.remove(self)
+
+class RedisBroker(Broker):
+    def __init__(self, url: str = CHAT_BROKER_URL, prefix: str = CHAT_BROKER_PREFIX):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("CHAT_BROKER=redis requires the 'redis' package")
+        self.redis = aioredis.from_url(url)
+        self.prefix = prefix
+        self.pubsub = None
+        self.task = None
+
+    async def start(self, handler):
+        await self._subscribe()
+        self.task = asyncio.create_task(self._listen(handler))
+
+    async def _subscribe(self):
+        self.pubsub = self.redis.pubsub()
+        await self.pubsub.psubscribe(f"{self.prefix}*")
+
+    async def publish(self, channel: str, message: dict):
+        await self.redis.publish(f"{self.prefix}{channel}", json.dumps(message))
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+        await self._close_pubsub()
+        await self.redis.aclose()
+
+    async def _listen(self, handler):
+        # Runs until stop(); a dropped connection is retried with backoff rather than
+        # ending the task, which would leave this worker deaf to every other worker
+        delay = CHAT_BROKER_RETRY_MIN_S
+        while True:
+            try:
+                if self.pubsub is None:
+                    await self._subscribe()
+                    logger.info("Chat broker resubscribed")
+                async for event in self.pubsub.listen():
+                    if event["type"] != "pmessage":
+                        continue
+                    delay = CHAT_BROKER_RETRY_MIN_S
+                    await self._dispatch(handler, event)
+                raise ConnectionError("subscription ended")
+            except Exception as e:
+                logger.error(f"Chat broker connection lost, resubscribing in {delay:g}s: {e}")
+                await self._close_pubsub()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, CHAT_BROKER_RETRY_MAX_S)
+
+    async def _dispatch(self, handler, event):
+        channel = event["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        try:
+            await handler(channel[len(self.prefix):], json.loads(event["data"]))
+        except Exception as e:
+            logger.error(f"Failed to handle chat message on {channel}: {e}")
+
+    async def _close_pubsub(self):
+        pubsub, self.pubsub = self.pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+def create_broker() -> Broker:
+    if CHAT_BROKER == 'local':
+        return LocalBroker()
+    if CHAT_BROKER == 'redis':
+        return RedisBroker()
+    raise ValueError(f"Unsupported chat broker: {CHAT_BROKER}")
@@ -0,0 +1,236 @@
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from pydantic_core import to_json
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from api import models
+from api import schemas
+from api.database import SessionLocal
+from api.fields import LISTING_FIELDS
+from api.listings import convert_to_db_compatible, sync_listing_indexes
+from api.ref_ids import assign_ref_ids
+
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '500'))
+EXPORT_YIELD_PER = int(os.getenv('EXPORT_YIELD_PER', '500'))
+
+LIST_FIELDS = {
+    name for name, field in schemas.BusinessListingBase.model_fields.items()
+    if getattr(field.annotation, "__origin__", None) is list
+}
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def import_format(request: Request, format: Optional[str]) -> str:
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        format = {
+            "application/x-ndjson": "ndjson",
+            "application/ndjson": "ndjson",
+            "application/jsonl": "ndjson",
+            "text/csv": "csv",
+        }.get(content_type)
+    if format not in FORMATS:
+        raise HTTPException(status_code=415, detail="Send NDJSON (application/x-ndjson) or CSV (text/csv)")
+    return format
+
+NOT_UTF8 = "Line is not valid UTF-8; uploads must be UTF-8 encoded"
+
+def _decode(line: bytes) -> Optional[str]:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+def _strip_bom(buffer: bytes) -> bytes:
+    if buffer.startswith((b"\xff\xfe", b"\xfe\xff")):
+        raise HTTPException(status_code=400, detail="Upload is UTF-16; send UTF-8")
+    # Spreadsheet exports often start with a UTF-8 byte order mark
+    return buffer.removeprefix(b"\xef\xbb\xbf")
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Split the request body into lines as it arrives; a line that is not UTF-8 comes back as None."""
+    buffer = b""
+    number = 0
+    started = False
+    async for chunk in stream:
+        buffer += chunk
+        if not started:
+            # Wait for enough bytes to recognise a byte order mark
+            if len(buffer) < 3:
+                continue
+            buffer, started = _strip_bom(buffer), True
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, _decode(line)
+    if not started:
+        buffer = _strip_bom(buffer)
+    if buffer:
+        yield number + 1, _decode(buffer)
+
+def parse_csv_cell(name: str, value: str):
+    if name not in LIST_FIELDS:
+        # Empty cells are missing values, e.g. a listing without coordinates
+        return value if value != "" else None
+    # List cells hold a JSON array, or values separated by ";"
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [item.strip() for item in value.split(";") if item.strip()]
+
+async def iter_records(lines: AsyncIterator[Tuple[int, Optional[str]]], format: str):
+    """Yield (line number, record dict or error message)."""
+    if format == "ndjson":
+        async for number, line in lines:
+            if line is None:
+                yield number, NOT_UTF8
+                continue
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, f"Invalid JSON: {e}"
+                continue
+            yield number, record if isinstance(record, dict) else "Each line must be a JSON object"
+        return
+
+    header = None
+    pending, start = "", 0
+    async for number, line in lines:
+        if line is None:
+            if header is None:
+                # Nothing was imported yet, and without the header no row can be read
+                raise HTTPException(status_code=400, detail=f"Line {number}: {NOT_UTF8}")
+            # Drops the record this line belongs to, even one spanning several lines
+            yield start or number, NOT_UTF8
+            pending, start = "", 0
+            continue
+        # A quoted CSV cell may contain newlines; keep reading until quotes balance
+        pending = f"{pending}\n{line}" if pending else line
+        start = start or number
+        if pending.count('"') % 2:
+            continue
+        text, record_line = pending, start
+        pending, start = "", 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield record_line, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        try:
+            yield record_line, {name: parse_csv_cell(name, value) for name, value in zip(header, values)}
+        except json.JSONDecodeError as e:
+            yield record_line, f"Invalid JSON list: {e}"
+    if pending:
+        yield start, "Unterminated quoted field"
+
+def insert_rows(db: Session, rows: List[dict]) -> List[int]:
+    """Insert listing rows and return their ids, in one executemany where RETURNING is supported."""
+    if db.get_bind().dialect.insert_executemany_returning:
+        stmt = insert(models.BusinessListing).returning(models.BusinessListing.id)
+        return db.execute(stmt, rows).scalars().all()
+    # SQLite before 3.35 has no RETURNING; a Core insert per row reports its id
+    listings = models.BusinessListing.__table__
+    return [db.execute(insert(listings), row).inserted_primary_key[0] for row in rows]
+
+def insert_chunk(db: Session, chunk: List[Tuple[int, schemas.BusinessListingCreate]]):
+    rows = [convert_to_db_compatible(listing.model_dump()) for _, listing in chunk]
+    # One counter reservation per location code for the whole chunk
+    assign_ref_ids(db, rows)
+    errors = []
+    try:
+        with db.begin_nested():
+            ids = insert_rows(db, rows)
+    except IntegrityError:
+        # Something in the chunk conflicts; retry row by row to find and report it
+        ids = []
+        for (number, _), row in zip(chunk, rows):
+            try:
+                with db.begin_nested():
+                    ids.extend(insert_rows(db, [row]))
+            except IntegrityError as e:
+                errors.append({"line": number, "errors": [{"msg": str(e.orig)}]})
+
+    if ids:
+        listings = db.execute(
+            select(models.BusinessListing).where(models.BusinessListing.id.in_(ids))
+        ).scalars().all()
+        sync_listing_indexes(db, *listings)
+    return len(ids), errors
+
+async def import_listings(db: AsyncSession, stream: AsyncIterator[bytes], format: str) -> dict:
+    inserted = 0
+    errors = []
+    chunk = []
+
+    async def flush():
+        nonlocal inserted
+        count, chunk_errors = await db.run_sync(insert_chunk, chunk)
+        # Each chunk commits on its own, so one bad chunk never undoes earlier ones
+        await db.commit()
+        inserted += count
+        errors.extend(chunk_errors)
+        chunk.clear()
+
+    async for number, record in iter_records(iter_lines(stream), format):
+        if isinstance(record, str):
+            errors.append({"line": number, "errors": [{"msg": record}]})
+            continue
+        try:
+            chunk.append((number, schemas.BusinessListingCreate.model_validate(record)))
+        except ValidationError as e:
+            errors.append({"line": number, "errors": json.loads(e.json(include_url=False))})
+            continue
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+
+    errors.sort(key=lambda error: error["line"])
+    return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def export_listings(format: str) -> Iterator[bytes]:
+    # Own session: the generator outlives the request's dependencies
+    with SessionLocal() as db:
+        result = db.execute(
+            select(models.BusinessListing)
+            .order_by(models.BusinessListing.id)
+            .execution_options(yield_per=EXPORT_YIELD_PER)
+        )
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(LISTING_FIELDS)
+            yield buffer.getvalue().encode()
+
+        for partition in result.scalars().partitions():
+            listings = schemas.listing_list_adapter.validate_python(partition, from_attributes=True)
+            if format == "ndjson":
+                yield b"".join(to_json(listing) + b"\n" for listing in listings)
+            else:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for listing in listings:
+                    data = listing.model_dump(mode="json")
+                    writer.writerow([_csv_value(data[name]) for name in LISTING_FIELDS])
+                yield buffer.getvalue().encode()
@@ -0,0 +1,279 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# "memory" keeps a per-process LRU; "redis" shares one cache between workers.
+# A write only invalidates the memory cache of the worker that handled it, so with
+# several workers or instances the others serve the old listing (and its ETag) for up
+# to CACHE_TTL; use "redis" there. Startup logs a warning when that looks likely.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_URL = os.getenv('CACHE_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+CACHE_TTL = float(os.getenv('CACHE_TTL', '300'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '2048'))
+CACHE_PREFIX = os.getenv('CACHE_PREFIX', 'stupid-be:cache:')
+
+# Tag shared by every cached response that lists many listings
+LISTINGS_TAG = "listings"
+
+def listing_tag(ref_id: str) -> str:
+    return f"listing:{ref_id}"
+
+class MemoryBackend:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self.tags = defaultdict(set)
+        self.generations = defaultdict(int)  # tag -> number of invalidations
+        self.evictions = 0
+        # Sync endpoints run in the threadpool, so guard the shared structures
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def generation(self, tags: Iterable[str]) -> tuple:
+        with self.lock:
+            return tuple(self.generations.get(tag, 0) for tag in tags)
+
+    def set(self, key: str, value: bytes, tags: Iterable[str], generation: Optional[tuple] = None) -> bool:
+        tags = tuple(tags)
+        with self.lock:
+            if generation is not None and generation != tuple(self.generations.get(tag, 0) for tag in tags):
+                return False
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self.tags[tag].add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+        return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self.lock:
+            for tag in tags:
+                self.generations[tag] += 1
+                for key in list(self.tags.pop(tag, ())):
+                    if key in self.entries:
+                        self._remove(key)
+                        removed += 1
+        return removed
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+
+    def size(self) -> int:
+        return len(self.entries)
+
+    def _remove(self, key: str):
+        _, _, tags = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+class RedisBackend:
+    def __init__(self, url: str = CACHE_URL, ttl: float = CACHE_TTL, prefix: str = CACHE_PREFIX):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self.redis = redis.Redis.from_url(url)
+        self.watch_error = redis.WatchError
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.redis.get(self.prefix + key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        # One round trip for the whole batch
+        return self.redis.mget([self.prefix + key for key in keys]) if keys else []
+
+    def generation(self, tags: Iterable[str]) -> tuple:
+        keys = [f"{self.prefix}gen:{tag}" for tag in tags]
+        return tuple(int(value or 0) for value in self.redis.mget(keys)) if keys else ()
+
+    def set(self, key: str, value: bytes, tags: Iterable[str], generation: Optional[tuple] = None) -> bool:
+        tags = tuple(tags)
+        gen_keys = [f"{self.prefix}gen:{tag}" for tag in tags]
+        with self.redis.pipeline() as pipe:
+            try:
+                if generation is not None and gen_keys:
+                    # WATCH makes the write fail if an invalidation lands before EXEC
+                    pipe.watch(*gen_keys)
+                    if tuple(int(v or 0) for v in pipe.mget(gen_keys)) != generation:
+                        return False
+                pipe.multi()
+                pipe.set(self.prefix + key, value, ex=self.ttl)
+                for tag in tags:
+                    pipe.sadd(f"{self.prefix}tag:{tag}", key)
+                    pipe.expire(f"{self.prefix}tag:{tag}", self.ttl)
+                pipe.execute()
+            except self.watch_error:
+                return False
+        return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            gen_key = f"{self.prefix}gen:{tag}"
+            self.redis.incr(gen_key)
+            self.redis.expire(gen_key, self.ttl)
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = self.redis.smembers(tag_key)
+            if keys:
+                removed += self.redis.delete(*[self.prefix + k.decode() for k in keys])
+            self.redis.delete(tag_key)
+        return removed
+
+    def clear(self):
+        for key in self.redis.scan_iter(f"{self.prefix}*"):
+            self.redis.delete(key)
+
+    def size(self) -> int:
+        return sum(1 for key in self.redis.scan_iter(f"{self.prefix}*") if b":tag:" not in key and b":gen:" not in key)
+
+class ResponseCache:
+    """Read-through cache of serialized JSON responses, invalidated by tag."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_builds = 0  # built values not cached because an invalidation overlapped
+
+    def get_or_build(self, key: str, tags: Iterable[str], build: Callable[[], bytes]) -> bytes:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A broken shared cache should degrade to a miss, not an error
+            logger.error(f"Cache read failed for {key}: {e}")
+            value = None
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        tags = tuple(tags)
+        generation = self._generation(tags)
+        value = build()
+        self._set(key, value, tags, generation)
+        return value
+
+    def _generation(self, tags: tuple) -> Optional[tuple]:
+        # Read before building: an invalidation that lands during the build changes it,
+        # and the then possibly stale value is served once but not cached
+        try:
+            return self.backend.generation(tags)
+        except Exception as e:
+            logger.error(f"Cache read failed for tags {tags}: {e}")
+            return None
+
+    def _set(self, key: str, value: bytes, tags: tuple, generation: Optional[tuple]):
+        if generation is None:
+            return
+        try:
+            if not self.backend.set(key, value, tags, generation):
+                self.stale_builds += 1
+        except Exception as e:
+            logger.error(f"Cache write failed for {key}: {e}")
+
+    def get_or_build_many(
+        self, keys: List[str], tags: Callable[[str], Iterable[str]], build: Callable[[List[str]], Dict[str, bytes]]
+    ) -> Dict[str, bytes]:
+        """
+        Batch get_or_build: build(missing_keys) is called once for every miss and returns
+        {key: value} for the keys it could build; keys it leaves out are not cached.
+        """
+        try:
+            found = dict(zip(keys, self.backend.get_many(keys)))
+        except Exception as e:
+            logger.error(f"Cache read failed for {len(keys)} keys: {e}")
+            found = dict.fromkeys(keys)
+        values = {key: value for key, value in found.items() if value is not None}
+        self.hits += len(values)
+
+        missing = [key for key in keys if key not in values]
+        if missing:
+            self.misses += len(missing)
+            missing_tags = {key: tuple(tags(key)) for key in missing}
+            generations = {key: self._generation(missing_tags[key]) for key in missing}
+            built = build(missing)
+            for key, value in built.items():
+                self._set(key, value, missing_tags[key], generations[key])
+            values.update(built)
+        return values
+
+    def invalidate(self, *tags: str):
+        self.invalidations += self.backend.invalidate(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "stale_builds": self.stale_builds,
+            "evictions": self.backend.evictions,
+            "entries": self.backend.size(),
+        }
+
+def multiple_workers() -> Optional[str]:
+    """Why this process is probably one of several serving the API, or None."""
+    workers = os.getenv('WEB_CONCURRENCY', '')
+    if workers.isdigit() and int(workers) > 1:
+        return f"WEB_CONCURRENCY={workers}"
+    if os.getenv('CHAT_BROKER') == 'redis':
+        return "CHAT_BROKER=redis"
+    if os.getenv('VERCEL'):
+        return "running on Vercel"
+    return None
+
+def check_shared(cache: ResponseCache):
+    reason = multiple_workers() if isinstance(cache.backend, MemoryBackend) else None
+    if reason:
+        logger.warning(
+            f"CACHE_BACKEND=memory with multiple workers ({reason}): updates only invalidate "
+            f"this worker's cache, others serve stale listings for up to {CACHE_TTL:g}s; "
+            "set CACHE_BACKEND=redis"
+        )
+
+def create_cache() -> ResponseCache:
+    if CACHE_BACKEND == 'memory':
+        return ResponseCache(MemoryBackend())
+    if CACHE_BACKEND == 'redis':
+        return ResponseCache(RedisBackend())
+    raise ValueError(f"Unsupported cache backend: {CACHE_BACKEND}")
+
+response_cache = create_cache()
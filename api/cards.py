@@ -0,0 +1,87 @@
+from sqlalchemy import delete, insert, text
+from api import financials
+from api import geo
+from api import models
+from api.migrations import add_missing_columns, backfill_listings, create_missing_indexes, migration
+from api.ref_ids import location_code
+
+# listing_cards backs the item-card list and search endpoints; see models.ListingCard
+
+def card_row(listing: models.BusinessListing) -> dict:
+    data = listing.to_dict()
+    search_text = " ".join(
+        [data["ref_id"] or "", data["title"] or "", data["business_name"] or "", data["location"] or ""]
+        + [str(value) for value in data["industry"]]
+    )
+    return {
+        "listing_id": listing.id,
+        "ref_id": data["ref_id"],
+        "title": data["title"],
+        "location": data["location"],
+        "district_code": location_code(data["location"]) or None,
+        "latitude": data["latitude"],
+        "longitude": data["longitude"],
+        "geohash": geo.point_geohash(data["latitude"], data["longitude"]),
+        "label": data["label"],
+        "involvement": data["involvement"],
+        "industry": data["industry"],
+        "search_text": search_text.lower(),
+        "size": data["size"],
+        "price": data["price"],
+        "turnover": data["turnover"],
+        "profit": data["profit"],
+        "rent": data["rent"],
+        "number_of_staff": data["number_of_staff"],
+        **financials.listing_metrics(listing),
+        "creation_datetime": data["creation_datetime"],
+        "updated_at": listing.updated_at,
+        "version": listing.version,
+    }
+
+def sync_cards(db, listings: list):
+    if not listings:
+        return
+    db.execute(delete(models.ListingCard).where(models.ListingCard.listing_id.in_([l.id for l in listings])))
+    db.execute(insert(models.ListingCard), [card_row(listing) for listing in listings])
+
+def sync_card(db, listing: models.BusinessListing):
+    sync_cards(db, [listing])
+
+def remove_card(db, listing_id: int):
+    # SQLite does not enforce the ON DELETE CASCADE unless foreign keys are switched on
+    db.execute(delete(models.ListingCard).where(models.ListingCard.listing_id == listing_id))
+
+# Range indexes added to business_listings by migration 6, superseded by the listing_cards ones
+SUPERSEDED_INDEXES = (
+    "ix_business_listings_price_id",
+    "ix_business_listings_turnover_id",
+    "ix_business_listings_profit_id",
+    "ix_business_listings_size_id",
+    "ix_business_listings_price_profit_turnover",
+    "ix_business_listings_rent_size",
+    "ix_business_listings_staff",
+    "ix_business_listings_profit_margin",
+)
+
+@migration(7, "listing card projection")
+def create_listing_cards(conn):
+    models.ListingCard.__table__.create(conn, checkfirst=True)
+    create_missing_indexes(conn, models.ListingCard.__table__)
+    backfill_listings(conn, sync_card)
+    for name in SUPERSEDED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+@migration(8, "listing coordinates, district codes and geohash index")
+def add_listing_geo(conn):
+    # Already present when upgrading from before migration 7 (see run_migrations); kept for
+    # databases that stopped at 7
+    add_missing_columns(conn, models.BusinessListing.__table__, "latitude", "longitude")
+    add_missing_columns(conn, models.ListingCard.__table__, "district_code", "latitude", "longitude", "geohash")
+    create_missing_indexes(conn, models.ListingCard.__table__)
+    backfill_listings(conn, sync_card)
+
+@migration(9, "stored financial metrics on listing cards")
+def add_card_financials(conn):
+    add_missing_columns(conn, models.ListingCard.__table__, "payback_months", "monthly_cost")
+    create_missing_indexes(conn, models.ListingCard.__table__)
+    backfill_listings(conn, sync_card)
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from api import models
+from api.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# "buffered": return as soon as the message is queued (write-behind)
+# "commit": wait until the batch holding the message is committed (group commit)
+CHAT_WRITE_DURABILITY = os.getenv('CHAT_WRITE_DURABILITY', 'buffered')
+CHAT_FLUSH_BATCH_SIZE = int(os.getenv('CHAT_FLUSH_BATCH_SIZE', '100'))
+CHAT_FLUSH_INTERVAL_MS = int(os.getenv('CHAT_FLUSH_INTERVAL_MS', '50'))
+CHAT_WRITE_QUEUE_SIZE = int(os.getenv('CHAT_WRITE_QUEUE_SIZE', '10000'))
+
+class MessageWriter:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = CHAT_FLUSH_BATCH_SIZE,
+        flush_interval_ms: int = CHAT_FLUSH_INTERVAL_MS,
+        durability: str = CHAT_WRITE_DURABILITY,
+        max_queue_size: int = CHAT_WRITE_QUEUE_SIZE,
+    ):
+        if durability not in ("buffered", "commit"):
+            raise ValueError(f"Unsupported chat write durability: {durability}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.durability = durability
+        self.max_queue_size = max_queue_size
+        self.queue = None
+        self.task = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self.task = asyncio.create_task(self._run())
+
+    async def write(self, user_email: str, message: str, sender: str):
+        self.start()
+        row = {
+            "user_email": user_email,
+            "message": message,
+            "sender": sender,
+            # Naive UTC: conversations.timestamp has no time zone and asyncpg rejects aware values
+            "timestamp": datetime.now(timezone.utc).replace(tzinfo=None),
+        }
+        done = asyncio.get_running_loop().create_future() if self.durability == "commit" else None
+        # A full queue pushes back on the sender instead of growing without bound
+        await self.queue.put((row, done))
+        if done is not None:
+            await done
+
+    async def stop(self):
+        # Drain whatever is still queued before shutting down
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        rows = [row for row, _ in batch]
+        error = None
+        try:
+            async with self.session_factory() as db:
+                await db.execute(insert(models.Conversation), rows)
+                await db.commit()
+        except Exception as e:
+            error = e
+            logger.error(f"Failed to store {len(rows)} chat messages: {e}")
+
+        for _, done in batch:
+            if done is not None and not done.done():
+                if error is None:
+                    done.set_result(None)
+                else:
+                    done.set_exception(error)
+
+message_writer = MessageWriter()
@@ -0,0 +1,120 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+
+# Lets browsers revalidate quickly while a CDN in front of the API holds responses longer
+LISTING_CACHE_CONTROL = os.getenv(
+    'LISTING_CACHE_CONTROL',
+    'public, max-age=30, s-maxage=300, stale-while-revalidate=600',
+)
+
+# For the full listing, whose strong ETag editors send back as If-Match: a shared cache
+# serving an old copy would hand out an old version's tag and turn the next save into a 409
+EDITABLE_CACHE_CONTROL = 'private, no-cache'
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime] = None
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def listing_validators(
+    listing_id: int, version: Optional[int], updated_at: Optional[datetime], strong: bool = False,
+) -> Validators:
+    """
+    Validators for one listing. Every write bumps version, so the full listing can carry a
+    strong ETag; projections and other views of the same version share the weak one.
+    """
+    opaque = f'"{listing_id}.{version or 1}"'
+    return Validators(opaque if strong else f"W/{opaque}", _as_utc(updated_at))
+
+def page_validators(rows: Iterable) -> Validators:
+    """Validators for a page of listings; rows expose id, version and updated_at."""
+    digest = hashlib.blake2b(digest_size=12)
+    last_modified = None
+    for row in rows:
+        digest.update(f"{row.id}.{row.version or 1};".encode())
+        updated_at = _as_utc(row.updated_at)
+        if updated_at is not None and (last_modified is None or updated_at > last_modified):
+            last_modified = updated_at
+    return Validators(f'W/"{digest.hexdigest()}"', last_modified)
+
+def pack(body: bytes, validators: Validators) -> bytes:
+    # Store validators in front of the body so cache hits can answer conditional requests
+    last_modified = validators.last_modified.isoformat() if validators.last_modified else ""
+    return f"{validators.etag}\n{last_modified}\n".encode() + body
+
+def unpack(value: bytes):
+    etag, last_modified, body = value.split(b"\n", 2)
+    last_modified = datetime.fromisoformat(last_modified.decode()) if last_modified else None
+    return body, Validators(etag.decode(), last_modified)
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def if_match_versions(request: Request) -> Optional[List[Tuple[int, int]]]:
+    """
+    (listing id, version) pairs named by If-Match, from strong listing_validators ETags.
+    None when the header is absent or "*". If-Match uses strong comparison, so weak tags,
+    like tags that are not listing ETags, never match.
+    """
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    versions = []
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            continue
+        listing_id, _, version = candidate.strip('"').partition(".")
+        if listing_id.isdigit() and version.isdigit():
+            versions.append((int(listing_id), int(version)))
+    return versions
+
+def not_modified(request: Request, validators: Validators) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validators.etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and validators.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one second resolution
+        return validators.last_modified.replace(microsecond=0) <= _as_utc(since)
+    return False
+
+def cache_headers(validators: Validators, cache_control: str = LISTING_CACHE_CONTROL) -> dict:
+    headers = {"ETag": validators.etag, "Cache-Control": cache_control}
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(validators.last_modified, usegmt=True)
+    return headers
+
+def conditional_response(
+    request: Request, body: bytes, validators: Validators, cache_control: str = LISTING_CACHE_CONTROL,
+) -> Response:
+    headers = cache_headers(validators, cache_control)
+    if not_modified(request, validators):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
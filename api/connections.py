@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from fastapi import WebSocket
+from api import metrics
+from api.broker import Broker, create_broker
+
+logger = logging.getLogger(__name__)
+
+WS_SEND_QUEUE_SIZE = int(os.getenv('WS_SEND_QUEUE_SIZE', '100'))
+WS_SEND_TIMEOUT = float(os.getenv('WS_SEND_TIMEOUT', '5'))
+# What to do when a connection's send queue is full:
+# "drop_oldest" / "drop_newest" discard a message, "disconnect" closes the slow socket
+WS_SLOW_CONSUMER_POLICY = os.getenv('WS_SLOW_CONSUMER_POLICY', 'drop_oldest')
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+# Broker channels; every worker subscribes to all of them and delivers to its own sockets
+ADMINS_CHANNEL = "admins"
+CLIENT_CHANNEL = "client"
+BROADCAST_CHANNEL = "broadcast"
+
+class ConnectionSender:
+    """Owns the outgoing side of one websocket: a bounded queue drained by its own writer task."""
+
+    def __init__(self, websocket: WebSocket, on_dead, queue_size: int = WS_SEND_QUEUE_SIZE,
+                 send_timeout: float = WS_SEND_TIMEOUT, policy: str = WS_SLOW_CONSUMER_POLICY):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unsupported slow consumer policy: {policy}")
+        self.websocket = websocket
+        self.on_dead = on_dead
+        self.send_timeout = send_timeout
+        self.policy = policy
+        self.dropped = 0
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task = asyncio.create_task(self._run())
+
+    def send(self, message) -> bool:
+        # Never blocks the caller; a full queue is resolved by the slow consumer policy
+        if self.task.done():
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        self.dropped += 1
+        if self.policy == "drop_newest":
+            return False
+        if self.policy == "disconnect":
+            logger.warning("Disconnecting slow websocket consumer")
+            self._die()
+            return False
+        self.queue.get_nowait()
+        self.queue.put_nowait(message)
+        return True
+
+    def close(self):
+        self.task.cancel()
+
+    def _die(self):
+        self.close()
+        self.on_dead(self)
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+    async def _run(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                if isinstance(message, str):
+                    await asyncio.wait_for(self.websocket.send_text(message), self.send_timeout)
+                else:
+                    await asyncio.wait_for(self.websocket.send_json(message), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Dropping dead websocket: {e!r}")
+                self.on_dead(self)
+                await self._close_socket()
+                return
+
+class ConnectionManager:
+    """
+    Tracks the websockets connected to this worker. Outgoing chat traffic is published
+    through the broker, so admins and clients can be connected to different workers.
+    """
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self.active_connections: Dict[str, ConnectionSender] = {}
+        self.admin_connections: List[ConnectionSender] = []
+        self.broker = broker or create_broker()
+        self.started = False
+
+    async def start(self):
+        if not self.started:
+            self.started = True
+            await self.broker.start(self._on_message)
+
+    async def stop(self):
+        if self.started:
+            self.started = False
+            await self.broker.stop()
+
+    async def connect(self, websocket: WebSocket, client_id: str):
+        await self.start()
+        await websocket.accept()
+        previous = self.active_connections.get(client_id)
+        if previous is not None:
+            previous.close()
+        self.active_connections[client_id] = ConnectionSender(websocket, self._prune)
+        await self.broadcast_to_admins({"type": "new_chat", "client": client_id})
+
+    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        sender = self.active_connections.get(client_id)
+        # A reconnect may already have replaced this socket
+        if sender is None or (websocket is not None and sender.websocket is not websocket):
+            return
+        del self.active_connections[client_id]
+        sender.close()
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        await websocket.send_text(message)
+
+    async def send_to_client(self, client_id: str, message):
+        # Delivered by whichever worker holds the client's socket
+        await self.broker.publish(CLIENT_CHANNEL, {"client": client_id, "message": message})
+
+    async def broadcast(self, message: str):
+        await self.broker.publish(BROADCAST_CHANNEL, {"message": message})
+
+    async def broadcast_to_admins(self, message: dict):
+        await self.broker.publish(ADMINS_CHANNEL, {"message": message})
+
+    async def connect_admin(self, websocket: WebSocket):
+        await self.start()
+        await websocket.accept()
+        self.admin_connections.append(ConnectionSender(websocket, self._prune))
+
+    def disconnect_admin(self, websocket: WebSocket):
+        for admin in list(self.admin_connections):
+            if admin.websocket is websocket:
+                self.admin_connections.remove(admin)
+                admin.close()
+
+    async def _on_message(self, channel: str, payload: dict):
+        started = time.perf_counter()
+        # Each admin socket has its own writer, so one slow admin cannot hold up the rest
+        if channel == ADMINS_CHANNEL:
+            recipients = list(self.admin_connections)
+        elif channel == CLIENT_CHANNEL:
+            sender = self.active_connections.get(payload["client"])
+            recipients = [sender] if sender is not None else []
+        elif channel == BROADCAST_CHANNEL:
+            recipients = list(self.active_connections.values())
+        else:
+            return
+        for sender in recipients:
+            sender.send(payload["message"])
+        metrics.WS_FANOUT.observe(time.perf_counter() - started, channel=channel)
+        metrics.WS_RECIPIENTS.inc(len(recipients), channel=channel)
+
+    def _prune(self, sender: ConnectionSender):
+        if sender in self.admin_connections:
+            self.admin_connections.remove(sender)
+        for client_id, client in list(self.active_connections.items()):
+            if client is sender:
+                del self.active_connections[client_id]
+
+manager = ConnectionManager()
+
+metrics.WS_CONNECTIONS.set_function(lambda: len(manager.active_connections), role="client")
+metrics.WS_CONNECTIONS.set_function(lambda: len(manager.admin_connections), role="admin")
@@ -1,11 +1,21 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from fastapi import HTTPException
+import logging
 import os
-from dotenv import load_dotenv
+import threading
+from api import metrics
+from api.pagination import InvalidCursor
 
-# Load environment variables
-load_dotenv('.env.local')
+logger = logging.getLogger(__name__)
+
+# Load environment variables; deployments set them directly and skip importing dotenv
+if os.path.exists('.env.local'):
+    from dotenv import load_dotenv
+    load_dotenv('.env.local')
 
 # Get database configuration from environment variables
 DB_TYPE = os.getenv('DB_TYPE', 'sqlite')  # default to sqlite if not specified
@@ -16,35 +26,109 @@ DB_USER = os.getenv('DB_USER', 'postgres')
 DB_URL = os.getenv('POSTGRES_URL_NON_POOLING', 'postgres')
 DB_PASSWORD = os.getenv('DB_PASSWORD', '')
 
+# Connection pool configuration, shared by the sync and async engines
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+pool_options = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
 
 def fix_postgres_url(url: str) -> str:
     if url and url.startswith('postgres://'):
         return url.replace('postgres://', 'postgresql://', 1)
     return url
 
+def to_async_url(url: str):
+    # Swap in the asyncio driver for the same database
+    async_url = make_url(url)
+    connect_args = {}
+    if async_url.drivername.startswith('sqlite'):
+        async_url = async_url.set(drivername='sqlite+aiosqlite')
+    else:
+        async_url = async_url.set(drivername='postgresql+asyncpg')
+        # asyncpg takes ssl instead of libpq's sslmode
+        sslmode = async_url.query.get('sslmode')
+        if sslmode:
+            async_url = async_url.difference_update_query(['sslmode'])
+            connect_args['ssl'] = sslmode
+    return async_url, connect_args
+
 # Configure database URL based on type
 if DB_TYPE == 'sqlite':
     
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(BASE_DIR, "database.db")
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-
+    # SQLITE_PATH points benchmarks and scratch runs at their own file
+    db_path = os.path.abspath(os.getenv('SQLITE_PATH', os.path.join(BASE_DIR, "database.db")))
     SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={"check_same_thread": False}
-    )
+    engine_options = {"connect_args": {"check_same_thread": False}}
 elif DB_TYPE == 'vercelpostgresql':
     SQLALCHEMY_DATABASE_URL = fix_postgres_url(f"{DB_URL}")
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    engine_options = {}
 elif DB_TYPE == 'postgresql':
     SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    engine_options = {}
 else:
     raise ValueError(f"Unsupported database type: {DB_TYPE}")
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL, async_connect_args = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+# Engines are created on first use, so importing the app never touches the database
+# or loads a driver; a cold start pays for that only when a request needs it
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine():
+    engine = _engines.get("sync")
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get("sync")
+            if engine is None:
+                if DB_TYPE == 'sqlite':
+                    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options, **pool_options)
+                # Query timing, the slow-query log and pool gauges for /metrics
+                metrics.instrument_engine(engine, "sync")
+                _engines["sync"] = engine
+    return engine
+
+def get_async_engine():
+    engine = _engines.get("async")
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get("async")
+            if engine is None:
+                engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=async_connect_args, **pool_options)
+                metrics.instrument_engine(engine.sync_engine, "async")
+                _engines["async"] = engine
+    return engine
+
+def __getattr__(name: str):
+    # database.engine / database.async_engine still work, creating the engine when first read
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+# Async sessions for the async handlers; objects stay usable after commit
+_async_session_factory = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+def SessionLocal(**kw):
+    return _session_factory(bind=get_engine(), **kw)
+
+def AsyncSessionLocal(**kw):
+    return _async_session_factory(bind=get_async_engine(), **kw)
 
 # Create Base class
 Base = declarative_base()
@@ -54,10 +138,27 @@ def get_db():
     db = SessionLocal()
     try:
         yield db
+    except (HTTPException, InvalidCursor):
+        # An expected client error, not a database failure
+        db.rollback()
+        raise
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.error(f"Database error: {e}")
         db.rollback()
         raise
     finally:
         db.close()
 
+# Dependency to get an async DB session, so async handlers never block the event loop
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except (HTTPException, InvalidCursor):
+            await db.rollback()
+            raise
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            await db.rollback()
+            raise
+
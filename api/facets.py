@@ -0,0 +1,55 @@
+from sqlalchemy import delete, exists, func, insert, select
+from api import models
+from api.migrations import backfill_listings, migration
+
+# Multi-valued BusinessListing attributes mirrored into listing_facets
+FACETS = ("industry", "label", "involvement", "transfer_method", "license", "reason")
+
+def facet_rows(listing_id: int, data: dict) -> list:
+    rows = []
+    for facet in FACETS:
+        for value in dict.fromkeys(data.get(facet) or []):
+            rows.append({"listing_id": listing_id, "facet": facet, "value": str(value)})
+    return rows
+
+def sync_facets_many(db, listings: list):
+    if not listings:
+        return
+    db.execute(delete(models.ListingFacet).where(models.ListingFacet.listing_id.in_([l.id for l in listings])))
+    rows = [row for listing in listings for row in facet_rows(listing.id, listing.to_dict())]
+    if rows:
+        db.execute(insert(models.ListingFacet), rows)
+
+def sync_facets(db, listing: models.BusinessListing):
+    sync_facets_many(db, [listing])
+
+def remove_facets(db, listing_id: int):
+    # SQLite does not enforce the ON DELETE CASCADE unless foreign keys are switched on
+    db.execute(delete(models.ListingFacet).where(models.ListingFacet.listing_id == listing_id))
+
+def has_facet(facet: str, value: str, listing_id=models.BusinessListing.id):
+    return exists().where(
+        models.ListingFacet.facet == facet,
+        models.ListingFacet.value == value,
+        models.ListingFacet.listing_id == listing_id,
+    )
+
+def facet_counts(db, listing_ids) -> dict:
+    """Count listings per facet value among listing_ids (a select of ids) in one grouped query."""
+    stmt = select(
+        models.ListingFacet.facet,
+        models.ListingFacet.value,
+        func.count(models.ListingFacet.listing_id),
+    ).where(
+        models.ListingFacet.listing_id.in_(listing_ids)
+    ).group_by(models.ListingFacet.facet, models.ListingFacet.value)
+
+    counts = {facet: {} for facet in FACETS}
+    for facet, value, count in db.execute(stmt):
+        counts[facet][value] = count
+    return counts
+
+@migration(2, "normalized listing facets")
+def create_listing_facets(conn):
+    models.ListingFacet.__table__.create(conn, checkfirst=True)
+    backfill_listings(conn, sync_facets)
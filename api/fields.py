@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Query
+from pydantic import ConfigDict, TypeAdapter, create_model
+from sqlalchemy.orm import load_only
+from api import models, schemas
+
+LISTING_FIELDS = tuple(schemas.BusinessListing.model_fields)
+
+# Always loaded alongside a projection: conditional GET validators are built from them
+VALIDATOR_COLUMNS = ("id", "version", "updated_at")
+
+def listing_fields(
+    fields: Optional[str] = Query(None, description="Comma-separated BusinessListing fields to return"),
+) -> Optional[Tuple[str, ...]]:
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(LISTING_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # Canonical order so every spelling of a field set shares one model and cache key
+    return tuple(name for name in LISTING_FIELDS if name in requested)
+
+@lru_cache(maxsize=256)
+def projection_model(fields: Tuple[str, ...]):
+    source = schemas.BusinessListing.model_fields
+    return create_model(
+        "BusinessListing_" + "_".join(fields),
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (source[name].annotation, source[name]) for name in fields},
+    )
+
+@lru_cache(maxsize=256)
+def projection_adapter(fields: Tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(List[projection_model(fields)])
+
+def load_columns(fields: Tuple[str, ...]):
+    names = dict.fromkeys(VALIDATOR_COLUMNS + fields)
+    return load_only(*[getattr(models.BusinessListing, name) for name in names])
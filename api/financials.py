@@ -0,0 +1,69 @@
+import statistics
+from collections import defaultdict
+from typing import Optional
+from sqlalchemy import select
+from api import models
+
+# Monthly outgoings that make up monthly_cost
+COST_COLUMNS = (
+    "rent",
+    "merchandise_cost",
+    "electricity_bill",
+    "water_bill",
+    "management_fee",
+    "air_conditioning_fee",
+    "rates_and_government_rent",
+    "other_expense",
+    "staff_salary",
+    "mpf",
+)
+
+AGGREGATE_GROUPS = ("industry", "district")
+AGGREGATE_METRICS = ("price", "payback_months", "profit_margin")
+PERCENTILES = {"p10": 10, "p25": 25, "median": 50, "p75": 75, "p90": 90}
+
+def listing_metrics(listing) -> dict:
+    """Derived figures for a listing (or anything with the same attributes)."""
+    profit = listing.profit or 0
+    turnover = listing.turnover or 0
+    return {
+        "profit_margin": profit / turnover if turnover else 0.0,
+        # Months of profit to recover the asking price; None when it never pays back
+        "payback_months": listing.price / profit if profit > 0 and listing.price is not None else None,
+        "monthly_cost": sum(getattr(listing, name) or 0 for name in COST_COLUMNS),
+    }
+
+def percentiles(values: list) -> Optional[dict]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return {name: values[0] for name in PERCENTILES}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {name: cuts[p - 1] for name, p in PERCENTILES.items()}
+
+def aggregate_statement(by: str):
+    card = models.ListingCard
+    columns = [getattr(card, metric) for metric in AGGREGATE_METRICS]
+    if by == "district":
+        return select(card.district_code, *columns).where(card.district_code.isnot(None))
+    # A listing counts once under each of its industries
+    facet = models.ListingFacet
+    return select(facet.value, *columns).join(card, card.listing_id == facet.listing_id).where(facet.facet == "industry")
+
+def aggregate(db, by: str) -> dict:
+    """Percentiles of price, payback and margin per industry or district, from one narrow scan of listing_cards."""
+    values = defaultdict(lambda: {metric: [] for metric in AGGREGATE_METRICS})
+    counts = defaultdict(int)
+    for key, *row in db.execute(aggregate_statement(by)):
+        counts[key] += 1
+        for metric, value in zip(AGGREGATE_METRICS, row):
+            if value is not None:
+                values[key][metric].append(value)
+
+    groups = []
+    for key in sorted(counts):
+        group = {"key": key, "count": counts[key]}
+        for metric in AGGREGATE_METRICS:
+            group[metric] = percentiles(values[key][metric])
+        groups.append(group)
+    return {"by": by, "groups": groups}
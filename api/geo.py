@@ -0,0 +1,97 @@
+import math
+from typing import List, NamedTuple, Optional
+
+# Geohash cells for the spatial grid index on listing_cards.geohash. A cell's
+# hash is a prefix of every point inside it, so "points in cell" is an index
+# range scan, and a radius or box query becomes a handful of range scans.
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~5 m cells; queries use shorter prefixes of it
+MAX_CELLS = 24  # most cells one query will scan before falling back to a coarser grid
+EARTH_RADIUS_KM = 6371.0088
+
+class BoundingBox(NamedTuple):
+    min_lat: float
+    min_lng: float
+    max_lat: float
+    max_lng: float
+
+def encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+def cell_size(precision: int):
+    """(lat degrees, lng degrees) covered by one cell at precision."""
+    total = precision * 5
+    return 180.0 / 2 ** (total // 2), 360.0 / 2 ** ((total + 1) // 2)
+
+def _steps(low: float, high: float, size: float, origin: float) -> List[float]:
+    # Centres of the grid cells of width size overlapping [low, high]
+    first = math.floor((low - origin) / size)
+    last = math.floor((high - origin) / size)
+    return [origin + (i + 0.5) * size for i in range(first, last + 1)]
+
+def covering_cells(box: BoundingBox) -> List[str]:
+    """The finest set of at most MAX_CELLS geohash prefixes that covers box."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_size, lng_size = cell_size(precision)
+        lats = _steps(box.min_lat, box.max_lat, lat_size, -90.0)
+        lngs = _steps(box.min_lng, box.max_lng, lng_size, -180.0)
+        if len(lats) * len(lngs) <= MAX_CELLS:
+            return sorted({encode(lat, lng, precision) for lat in lats for lng in lngs})
+    return [""]
+
+def prefix_end(prefix: str) -> Optional[str]:
+    """The first geohash after every hash starting with prefix; None if there is none."""
+    # Increment within BASE32 rather than appending a sentinel like "~", whose
+    # position depends on the column's collation
+    for i in range(len(prefix) - 1, -1, -1):
+        if prefix[i] != BASE32[-1]:
+            return prefix[:i] + BASE32[BASE32.index(prefix[i]) + 1]
+    return None
+
+def prefix_range(column, prefix: str):
+    # Plain range rather than LIKE so every backend can use the index
+    if not prefix:
+        return column.isnot(None)
+    end = prefix_end(prefix)
+    if end is None:
+        return column >= prefix
+    return (column >= prefix) & (column < end)
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def radius_box(lat: float, lng: float, radius_km: float) -> BoundingBox:
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # Longitude degrees shrink towards the poles
+    lng_delta = lat_delta / max(math.cos(math.radians(lat)), 1e-6)
+    return BoundingBox(
+        max(lat - lat_delta, -90.0), max(lng - lng_delta, -180.0),
+        min(lat + lat_delta, 90.0), min(lng + lng_delta, 180.0),
+    )
+
+def point_geohash(lat: Optional[float], lng: Optional[float]) -> Optional[str]:
+    if lat is None or lng is None:
+        return None
+    return encode(lat, lng)
@@ -1,29 +1,57 @@
-import json
 import sys
 import os
-from api.database import SessionLocal, engine, get_db
+from api.database import get_async_db, get_db
 from datetime import date, datetime, timedelta, timezone
 from fastapi import FastAPI, Query, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.websockets import WebSocketDisconnect
-from pydantic import ValidationError
-from sqlalchemy import cast, Float, desc, or_, select
+from pydantic_core import to_json
+from sqlalchemy import desc, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 import logging
+from contextlib import asynccontextmanager
+from api import bulk
 from api import models
 from api import schemas
+from api import conditional
+from api import facets
+from api import financials
+from api import geo
+from api import metrics
+from api import search
+from api import streaming
+from api.cache import LISTINGS_TAG, check_shared, listing_tag, response_cache
+from api.chat_store import message_writer
+from api.connections import manager
+from api.listings import apply_listing_update, convert_to_db_compatible, insert_listing, remove_listing_indexes, sync_listing_indexes
+from api.fields import listing_fields, load_columns, projection_adapter, projection_model
+from api import migrations
+from api.pagination import InvalidCursor, SortKey, page_statement, paginate
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-models.Base.metadata.create_all(bind=engine)
-
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes run out of band (python -m api.migrations), not on every cold start
+    if migrations.DB_AUTO_MIGRATE:
+        await run_in_threadpool(migrations.migrate)
+    check_shared(response_cache)
+    message_writer.start()
+    await manager.start()
+    yield
+    await manager.stop()
+    # Flush buffered chat messages before the worker exits
+    await message_writer.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -42,83 +70,47 @@ app.add_middleware(
         "Accept",
         "Origin",
         "X-Requested-With",
+        "If-Match",
     ],
     expose_headers=["*"],
     max_age=600,
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    # Prometheus text format: request latency, SQL per request, pool and websocket state
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# Newest first; id orders messages written in the same batch
+HISTORY_ORDER = [
+    SortKey("ts", models.Conversation.timestamp, descending=True),
+    SortKey("id", models.Conversation.id, descending=True),
+]
+
+async def get_recent_conversations(db: AsyncSession, user_email: str, limit: int, before: Optional[str]):
+    stmt = select(models.Conversation).where(models.Conversation.user_email == user_email)
+    if before is None:
+        # Clients without a cursor keep the seven day window they always had
+        # Conversation timestamps are stored naive, in UTC; asyncpg rejects an aware bound
+        seven_days_ago = (datetime.now(timezone.utc) - timedelta(days=7)).replace(tzinfo=None)
+        stmt = stmt.where(models.Conversation.timestamp > seven_days_ago)
+    rows, next_cursor = await db.run_sync(
+        lambda session: paginate(session, stmt, HISTORY_ORDER, "history", limit, cursor=before)
+    )
+    # Pages walk backwards in time, but each page reads oldest to newest
+    return [row[0] for row in reversed(rows)], next_cursor
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.admin_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        await self.broadcast_to_admins({"type": "new_chat", "client": client_id})
-
-    def disconnect(self, client_id: str):
-        del self.active_connections[client_id]
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections.values():
-            await connection.send_text(message)
-
-    async def broadcast_to_admins(self, message: dict):
-        print(f"Broadcasting to {len(self.admin_connections)} admins: {message}")  # Add this line
-        for admin in self.admin_connections:
-            await admin.send_json(message)
-
-    async def connect_admin(self, websocket: WebSocket):
-        await websocket.accept()
-        self.admin_connections.append(websocket)
-
-    def disconnect_admin(self, websocket: WebSocket):
-        self.admin_connections.remove(websocket)
-
-manager = ConnectionManager()
-
-# Dependency
-def convert_to_db_compatible(data: dict) -> dict:
-    for key, value in data.items():
-        if isinstance(value, list):
-            data[key] = json.dumps(value)
-        if isinstance(value, datetime):
-            if value.tzinfo is None:
-                # If the datetime is naive, make it timezone-aware with UTC
-                data[key] = value.replace(tzinfo=timezone.utc)
-            else:
-                # If it's already timezone-aware, ensure it's in UTC
-                data[key] = value.astimezone(timezone.utc)
-    return data
-
-def store_message(db: Session, user_email: str, message: str, sender: str):
-    new_message = models.Conversation(user_email=user_email, message=message, sender=sender, timestamp=datetime.now(timezone.utc))
-    db.add(new_message)
-    db.commit()
-    db.refresh(new_message)
-    return new_message
-
-def get_recent_conversations(db: Session, user_email: str):
-    seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
-    return db.query(models.Conversation).filter(
-        models.Conversation.user_email == user_email,
-        models.Conversation.timestamp > seven_days_ago
-    ).order_by(models.Conversation.timestamp.asc()).all()
-    
 @app.websocket("/ws/chat/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await manager.connect(websocket, client_id)
     try:
         while True:
             data = await websocket.receive_json()
-            print(f"Received message from client {client_id}: {data}")
+            logger.debug(f"Received message from client {client_id}")
             
-            # Store the message
-            store_message(db, client_id, data["content"], data["sender"])
+            # Queue the message; it is written in batches off the receive loop
+            await message_writer.write(client_id, data["content"], data["sender"])
             
             await manager.broadcast_to_admins({
                 "type": "message", 
@@ -126,246 +118,517 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str, db: Session =
                 "sender": data["sender"], 
                 "content": data["content"]
             })
-            print(f"Broadcasted message to admins: {data}")
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
-        print(f"Client {client_id} disconnected")
+        manager.disconnect(client_id, websocket)
+        logger.debug(f"Client {client_id} disconnected")
 
 @app.websocket("/ws/admin")
-async def admin_websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)):
+async def admin_websocket_endpoint(websocket: WebSocket):
     await manager.connect_admin(websocket)
     try:
         while True:
             data = await websocket.receive_json()
-            print(f"Received message from admin: {data}")
             if data["type"] == "admin_message":
-                client_ws = manager.active_connections.get(data["client"])
-                if client_ws:
-                    await client_ws.send_json({"sender": "Admin", "content": data["content"]})
-                    print(f"Sent admin message to client {data['client']}")
-                    
-                    # Store the admin message
-                    store_message(db, data["client"], data["content"], "Admin")
+                # The client may be connected to another worker, so route through the broker
+                await manager.send_to_client(data["client"], {"sender": "Admin", "content": data["content"]})
+                logger.debug(f"Sent admin message to client {data['client']}")
+
+                # Store the admin message
+                await message_writer.write(data["client"], data["content"], "Admin")
     except WebSocketDisconnect:
         manager.disconnect_admin(websocket)
-        print("Admin disconnected")
+        logger.debug("Admin disconnected")
 
 @app.get("/api/py/conversations/{user_email}")
-async def get_conversations(user_email: str, db: Session = Depends(get_db)):
-    conversations = get_recent_conversations(db, user_email)
-    return [
+async def get_conversations(
+    user_email: str,
+    limit: int = Query(100, ge=1, le=500),
+    before: Optional[str] = Query(None, description="next_cursor of the previous page; empty for the latest page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    conversations, next_cursor = await get_recent_conversations(db, user_email, limit, before)
+    messages = [
         {
             "sender": conv.sender,
             "content": conv.message,
             "timestamp": conv.timestamp.isoformat()
         } for conv in conversations
     ]
+    return page_response(messages, next_cursor, before)
 
 @app.get("/api/py/latest-chats")
-async def get_latest_chats(limit: int = 10, db: Session = Depends(get_db)):
-    # Query to get the latest chats
-    latest_chats = db.query(models.Conversation.user_email)\
-        .distinct(models.Conversation.user_email)\
-        .order_by(models.Conversation.user_email, desc(models.Conversation.timestamp))\
+async def get_latest_chats(limit: int = 10, limit_messages: int = Query(5, ge=1), db: AsyncSession = Depends(get_async_db)):
+    conv = models.Conversation
+
+    # The users with the most recent activity...
+    top_users = select(conv.user_email, func.max(conv.timestamp).label("latest"))\
+        .group_by(conv.user_email)\
+        .order_by(desc("latest"), conv.user_email)\
         .limit(limit)\
-        .all()
-
-    result = []
-    for chat in latest_chats:
-        user_email = chat.user_email
-        messages = db.query(models.Conversation)\
-            .filter(models.Conversation.user_email == user_email)\
-            .order_by(desc(models.Conversation.timestamp))\
-            .limit(5)\
-            .all()
-        
-        result.append({
-            "email": user_email,
-            "messages": [
-                {
-                    "sender": msg.sender,
-                    "content": msg.message,
-                    "timestamp": msg.timestamp.isoformat()
-                } for msg in reversed(messages)
-            ]
+        .cte("top_users")
+
+    # ...and each one's last messages, numbered newest first
+    ranked = select(
+        conv.user_email,
+        conv.message,
+        conv.sender,
+        conv.timestamp,
+        top_users.c.latest,
+        func.row_number().over(
+            partition_by=conv.user_email,
+            order_by=(desc(conv.timestamp), desc(conv.id)),
+        ).label("position"),
+    ).join(top_users, top_users.c.user_email == conv.user_email).subquery("ranked")
+
+    rows = (await db.execute(
+        select(ranked)
+        .where(ranked.c.position <= limit_messages)
+        .order_by(desc(ranked.c.latest), ranked.c.user_email, desc(ranked.c.position))
+    )).all()
+
+    chats = {}
+    for row in rows:
+        chats.setdefault(row.user_email, []).append({
+            "sender": row.sender,
+            "content": row.message,
+            "timestamp": row.timestamp.isoformat()
         })
 
-    return result
+    return [{"email": user_email, "messages": messages} for user_email, messages in chats.items()]
 
-@app.get("/api/py/businesses/search", response_model=List[schemas.BusinessItemView])
-def search_businesses(
-    db: Session = Depends(get_db),
+def search_filters(
     keyword: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
     min_turnover: Optional[float] = Query(None),
     max_turnover: Optional[float] = Query(None),
+    min_profit: Optional[float] = Query(None),
+    max_profit: Optional[float] = Query(None),
+    min_rent: Optional[float] = Query(None),
+    max_rent: Optional[float] = Query(None),
+    min_size: Optional[float] = Query(None),
+    max_size: Optional[float] = Query(None),
+    min_staff: Optional[int] = Query(None),
+    max_staff: Optional[int] = Query(None),
+    min_margin: Optional[float] = Query(None, description="Profit / turnover, e.g. 0.2"),
+    max_margin: Optional[float] = Query(None),
+    min_payback: Optional[float] = Query(None, description="Months of profit to recover the price"),
+    max_payback: Optional[float] = Query(None),
+    min_monthly_cost: Optional[float] = Query(None),
+    max_monthly_cost: Optional[float] = Query(None),
     location: Optional[str] = Query(None),
     industry: Optional[str] = Query(None),
+    label: Optional[str] = Query(None),
+    district: Optional[str] = Query(None, description="District code, e.g. WC"),
+    q: Optional[str] = Query(None, description="Case-insensitive substring of ref_id, title, business name, location or industry"),
+) -> dict:
+    return {
+        "keyword": keyword,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_turnover": min_turnover,
+        "max_turnover": max_turnover,
+        "min_profit": min_profit,
+        "max_profit": max_profit,
+        "min_rent": min_rent,
+        "max_rent": max_rent,
+        "min_size": min_size,
+        "max_size": max_size,
+        "min_staff": min_staff,
+        "max_staff": max_staff,
+        "min_margin": min_margin,
+        "max_margin": max_margin,
+        "min_payback": min_payback,
+        "max_payback": max_payback,
+        "min_monthly_cost": min_monthly_cost,
+        "max_monthly_cost": max_monthly_cost,
+        "location": location,
+        "industry": industry,
+        "label": label,
+        "district": district,
+        "q": q,
+    }
+
+# Filter name -> column compared against min_<name> / max_<name>
+RANGE_FILTERS = {
+    "price": models.ListingCard.price,
+    "turnover": models.ListingCard.turnover,
+    "profit": models.ListingCard.profit,
+    "rent": models.ListingCard.rent,
+    "size": models.ListingCard.size,
+    "staff": models.ListingCard.number_of_staff,
+    "margin": models.ListingCard.profit_margin,
+    "payback": models.ListingCard.payback_months,
+    "monthly_cost": models.ListingCard.monthly_cost,
+}
+
+def filter_listings(db: Session, query, filters: dict):
+    # Filters a query over listing_cards; returns it with the full-text match subquery (None without a keyword)
+    match = search.match_subquery(db, filters["keyword"]) if filters["keyword"] is not None else None
+    if match is not None:
+        query = query.join(match, match.c.listing_id == models.ListingCard.listing_id)
+    # Plain comparisons on the stored columns so the range indexes apply
+    for name, column in RANGE_FILTERS.items():
+        if filters[f"min_{name}"] is not None:
+            query = query.filter(column >= filters[f"min_{name}"])
+        if filters[f"max_{name}"] is not None:
+            query = query.filter(column <= filters[f"max_{name}"])
+    if filters["location"] is not None:
+        query = query.filter(models.ListingCard.location.ilike(f"%{filters['location']}%"))
+    if filters["industry"] is not None:
+        query = query.filter(facets.has_facet("industry", filters["industry"], models.ListingCard.listing_id))
+    if filters["label"] is not None:
+        query = query.filter(facets.has_facet("label", filters["label"], models.ListingCard.listing_id))
+    if filters["district"] is not None:
+        query = query.filter(models.ListingCard.district_code == filters["district"].upper())
+    if filters["q"]:
+        query = query.filter(models.ListingCard.search_text.contains(filters["q"].lower(), autoescape=True))
+    return query, match
+
+# Newest listings first; id breaks ties between listings created at the same instant
+NEWEST_FIRST = [
+    SortKey("created", models.BusinessListing.creation_datetime, descending=True),
+    SortKey("id", models.BusinessListing.id, descending=True),
+]
+
+def card_sort(name: str, column, descending: bool, nullable: bool = False) -> List[SortKey]:
+    return [SortKey(name, column, descending, nullable), SortKey("id", models.ListingCard.listing_id, descending)]
+
+# ?sort= values for the card views; "-" means highest first. Each has a matching listing_cards index
+CARD_SORTS = {
+    "newest": card_sort("created", models.ListingCard.creation_datetime, True),
+    "price": card_sort("price", models.ListingCard.price, False),
+    "-price": card_sort("price", models.ListingCard.price, True),
+    "turnover": card_sort("turnover", models.ListingCard.turnover, False),
+    "-turnover": card_sort("turnover", models.ListingCard.turnover, True),
+    "profit_margin": card_sort("margin", models.ListingCard.profit_margin, False),
+    "-profit_margin": card_sort("margin", models.ListingCard.profit_margin, True),
+    # Listings that never pay back (no profit) come last either way
+    "payback": card_sort("payback", models.ListingCard.payback_months, False, nullable=True),
+    "-payback": card_sort("payback", models.ListingCard.payback_months, True, nullable=True),
+    "monthly_cost": card_sort("cost", models.ListingCard.monthly_cost, False),
+    "-monthly_cost": card_sort("cost", models.ListingCard.monthly_cost, True),
+}
+
+def json_response(content) -> Response:
+    # Models are dumped straight to JSON bytes, skipping response_model re-validation
+    return Response(content=to_json(content), media_type="application/json")
+
+def page_response(items: list, next_cursor: Optional[str], cursor: Optional[str]):
+    # Clients opt into the envelope by sending cursor (empty for the first page);
+    # skip-based clients keep getting a bare list
+    if cursor is None:
+        return items
+    return schemas.Page(items=items, next_cursor=next_cursor)
+
+@app.get(
+    "/api/py/businesses/search",
+    response_model=Union[List[schemas.BusinessItemView], schemas.Page[schemas.BusinessItemView]],
+)
+def search_businesses(
+    db: Session = Depends(get_db),
+    filters: dict = Depends(search_filters),
     skip: int = Query(0),
-    limit: int = Query(10)
+    limit: int = Query(10),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None, description=f"One of: {', '.join(CARD_SORTS)}"),
 ):
-    query = db.query(models.BusinessListing)
+    if sort is not None and sort not in CARD_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort: {sort}")
     try:
-        if keyword is not None:
-            query = query.filter(or_(
-                models.BusinessListing.title.ilike(f"%{keyword}%"),
-                models.BusinessListing.description.ilike(f"%{keyword}%")
-            ))
-        if min_price is not None:
-            query = query.filter(cast(models.BusinessListing.price, Float) >= min_price)
-        if max_price is not None:
-            query = query.filter(cast(models.BusinessListing.price, Float) <= max_price)
-        if min_turnover is not None:
-            query = query.filter(cast(models.BusinessListing.turnover, Float) >= min_turnover)
-        if max_turnover is not None:
-            query = query.filter(cast(models.BusinessListing.turnover, Float) <= max_turnover)
-        if location is not None:
-            query = query.filter(models.BusinessListing.location.ilike(f"%{location}%"))
-        if industry is not None:
-            query = query.filter(models.BusinessListing.industry.ilike(f"%{industry}%"))
-
-        businesses = query.offset(skip).limit(limit).all()
-    except Exception as e:
-            print(f"Error in search_businesses: {str(e)}")  # Log the error
+        stmt, match = filter_listings(db, select(models.ListingCard), filters)
+        if sort is not None:
+            keys = CARD_SORTS[sort]
+        elif match is not None:
+            sort, keys = "relevance", [SortKey("rank", match.c.rank), SortKey("id", models.ListingCard.listing_id)]
+        else:
+            sort, keys = "newest", CARD_SORTS["newest"]
+
+        rows, next_cursor = paginate(db, stmt, keys, sort, limit, cursor=cursor, skip=skip)
+    except InvalidCursor:
+        raise
+    except Exception:
+            logger.exception("Error in search_businesses")
             raise HTTPException(status_code=500, detail="An error occurred while searching businesses")
-    # Convert SQLAlchemy models to Pydantic models using model_validate
-    business_items = []
-    for item in businesses:
-        business_item = schemas.BusinessItemView(
-            ref_id=item.ref_id,
-            title=item.title,
-            label=json.loads(item.label) if isinstance(item.label, str) else item.label,
-            involvement=json.loads(item.involvement) if isinstance(item.involvement, str) else item.involvement,
-            industry=json.loads(item.industry) if isinstance(item.industry, str) else item.industry,
-            location=item.location,
-            size=item.size,
-            price=item.price,
-            turnover=item.turnover
-        )
-        business_items.append(business_item)
-    return business_items
+    items = schemas.item_list_adapter.validate_python([row[0] for row in rows], from_attributes=True)
+    return json_response(page_response(items, next_cursor, cursor))
+
+@app.get("/api/py/businesses/search/facets")
+def search_business_facets(db: Session = Depends(get_db), filters: dict = Depends(search_filters)):
+    # Facet value counts over the whole result set of the matching search
+    stmt, _ = filter_listings(db, select(models.ListingCard.listing_id), filters)
+    return facets.facet_counts(db, stmt)
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
 
 # Add this error handler to catch validation errors that occur during request parsing
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.error("RequestValidationError:")
-    logger.error(exc.errors())
+    # Field locations only; the rejected input may hold personal details
+    fields = ", ".join(".".join(str(part) for part in error["loc"]) for error in exc.errors())
+    logger.info(f"Request validation failed on {request.url.path}: {fields}")
     return JSONResponse(
         status_code=422,
         content={"detail": exc.errors()},
     )
 
 @app.post("/api/py/businesses", response_model=schemas.BusinessListing)
-async def create_listing(request: Request, listing: schemas.BusinessListingCreate, db: Session = Depends(get_db)):
+async def create_listing(request: Request, listing: schemas.BusinessListingCreate, db: AsyncSession = Depends(get_async_db)):
     try:
-        body = await request.body()
-        logger.error("Raw POST content:")
-        logger.error(body.decode())
-
-        # Log the parsed JSON content
-        json_body = await request.json()
-        logger.error("Parsed JSON content:")
-        logger.error(json.dumps(json_body, indent=2))
-
-        # Validate the data against your Pydantic model
-        listing = schemas.BusinessListingCreate(**json_body)
-
+        # FastAPI has already parsed and validated the body into listing
         db_compatible_dict = convert_to_db_compatible(listing.model_dump())
-        db_listing = models.BusinessListing(**db_compatible_dict)
-        db.add(db_listing)
-        db.commit()
-        db.refresh(db_listing)
+        db_listing = await db.run_sync(insert_listing, db_compatible_dict)
+        await db.run_sync(sync_listing_indexes, db_listing)
+        await db.commit()
+        await run_in_threadpool(response_cache.invalidate, listing_tag(db_listing.ref_id), LISTINGS_TAG)
+        await db.refresh(db_listing)
         return schemas.BusinessListing(**db_listing.to_dict())
 
-    except ValidationError as e:
-            logger.error("Validation error:")
-            logger.error(e.json())
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Unexpected error creating listing")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/api/py/businesses_items", response_model=List[schemas.BusinessItemView])
-def read_business_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    # Select the columns we need
-    stmt = select(
-        models.BusinessListing.ref_id,
-        models.BusinessListing.title,
-        models.BusinessListing.label,
-        models.BusinessListing.involvement,
-        models.BusinessListing.industry,
-        models.BusinessListing.location,
-        models.BusinessListing.size,
-        models.BusinessListing.price,
-        models.BusinessListing.turnover
-    ).offset(skip).limit(limit)
-
-    result = db.execute(stmt)
-    listings = result.all()
+@app.get(
+    "/api/py/businesses_items",
+    response_model=Union[List[schemas.BusinessItemView], schemas.Page[schemas.BusinessItemView]],
+)
+def read_business_items(request: Request, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    key = f"items?skip={skip}&limit={limit}&cursor={cursor}"
+    cached = response_cache.get_or_build(key, [LISTINGS_TAG], lambda: build_business_items(db, skip, limit, cursor))
+    return conditional.conditional_response(request, *conditional.unpack(cached))
+
+def build_business_items(db: Session, skip: int, limit: int, cursor: Optional[str]) -> bytes:
+    rows, next_cursor = paginate(db, select(models.ListingCard), CARD_SORTS["newest"], "newest", limit, cursor=cursor, skip=skip)
+    listings = [row[0] for row in rows]
 
     # Convert the result to a list of BusinessItemView objects
-    business_items = []
-    for item in listings:
-        business_item = schemas.BusinessItemView(
-            ref_id=item.ref_id,
-            title=item.title,
-            label=json.loads(item.label) if isinstance(item.label, str) else item.label,
-            involvement=json.loads(item.involvement) if isinstance(item.involvement, str) else item.involvement,
-            industry=json.loads(item.industry) if isinstance(item.industry, str) else item.industry,
-            location=item.location,
-            size=item.size,
-            price=item.price,
-            turnover=item.turnover
+    page = page_response(schemas.item_list_adapter.validate_python(listings, from_attributes=True), next_cursor, cursor)
+    return conditional.pack(to_json(page), conditional.page_validators(listings))
+
+@app.get(
+    "/api/py/businesses",
+    response_model=Union[List[schemas.BusinessListing], schemas.Page[schemas.BusinessListing]],
+)
+def read_listings(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[Tuple[str, ...]] = Depends(listing_fields),
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$", description="Serialize rows as they are read"),
+    db: Session = Depends(get_db),
+):
+    stmt = select(models.BusinessListing)
+    if fields:
+        stmt = stmt.options(load_columns(fields))
+    adapter = projection_adapter(fields) if fields else schemas.listing_list_adapter
+    if stream:
+        # Built here so a bad cursor is still a 400, not a broken stream
+        page = page_statement(stmt, NEWEST_FIRST, "newest", limit, cursor=cursor, skip=skip)
+        return StreamingResponse(
+            streaming.stream_page(page, NEWEST_FIRST, "newest", limit, adapter, stream, envelope=cursor is not None),
+            media_type=streaming.MEDIA_TYPES[stream],
         )
-        business_items.append(business_item)
 
-    return business_items
+    rows, next_cursor = paginate(db, stmt, NEWEST_FIRST, "newest", limit, cursor=cursor, skip=skip)
+    listings = [row[0] for row in rows]
+
+    # Decide on a 304 before paying for serialization
+    validators = conditional.page_validators(listings)
+    if conditional.not_modified(request, validators):
+        return Response(status_code=304, headers=conditional.cache_headers(validators))
+
+    businesses = adapter.validate_python(listings, from_attributes=True)
+    return conditional.conditional_response(request, to_json(page_response(businesses, next_cursor, cursor)), validators)
+
+@app.post("/api/py/businesses/bulk")
+async def bulk_import_listings(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    report = await bulk.import_listings(db, request.stream(), bulk.import_format(request, format))
+    if report["inserted"]:
+        await run_in_threadpool(response_cache.invalidate, LISTINGS_TAG)
+    return report
+
+# Declared before /api/py/businesses/{ref_id} so these paths are not taken for a ref_id
+@app.get("/api/py/businesses/export")
+def export_listings(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    return StreamingResponse(
+        bulk.export_listings(format),
+        media_type=bulk.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="listings.{format}"'},
+    )
+
+@app.get("/api/py/businesses/aggregates")
+def listing_aggregates(by: str = Query("industry", pattern=f"^({'|'.join(financials.AGGREGATE_GROUPS)})$"), db: Session = Depends(get_db)):
+    # Percentiles of price, payback and margin per group; rebuilt after any listing write
+    body = response_cache.get_or_build(
+        f"aggregates:{by}", [LISTINGS_TAG], lambda: to_json(financials.aggregate(db, by))
+    )
+    return Response(content=body, media_type="application/json")
+
+def cards_in_box(stmt, box: geo.BoundingBox):
+    card = models.ListingCard
+    # The geohash ranges narrow to a few index scans; the exact box check runs on what they return
+    return stmt.where(
+        or_(*[geo.prefix_range(card.geohash, cell) for cell in geo.covering_cells(box)]),
+        card.latitude.between(box.min_lat, box.max_lat),
+        card.longitude.between(box.min_lng, box.max_lng),
+    )
 
-@app.get("/api/py/businesses", response_model=List[schemas.BusinessListing])
-def read_listings(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    listings = db.query(models.BusinessListing).offset(skip).limit(limit).all()
-    logger.error(listings)
-    businesses = []
-    for item in listings:
-        businesses.append(schemas.BusinessListing(**item.to_dict()))
-    return businesses
+@app.get("/api/py/businesses/nearby", response_model=List[schemas.NearbyItem])
+def nearby_businesses(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(2.0, gt=0, le=50),
+    limit: int = Query(50, ge=1, le=500),
+    filters: dict = Depends(search_filters),
+    db: Session = Depends(get_db),
+):
+    stmt, _ = filter_listings(db, select(models.ListingCard), filters)
+    cards = db.execute(cards_in_box(stmt, geo.radius_box(lat, lng, radius_km))).scalars().all()
+
+    nearby = []
+    for card in cards:
+        distance = geo.haversine_km(lat, lng, card.latitude, card.longitude)
+        if distance <= radius_km:
+            nearby.append((distance, card))
+    nearby.sort(key=lambda pair: (pair[0], pair[1].listing_id))
+    return json_response([
+        schemas.NearbyItem(**schemas.BusinessMapItem.model_validate(card).model_dump(), distance_km=round(distance, 3))
+        for distance, card in nearby[:limit]
+    ])
+
+@app.get("/api/py/businesses/within", response_model=List[schemas.BusinessMapItem])
+def businesses_within(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(500, ge=1, le=2000),
+    filters: dict = Depends(search_filters),
+    db: Session = Depends(get_db),
+):
+    # Map view: listings inside the visible bounding box, newest first
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="min_lat/min_lng must not exceed max_lat/max_lng")
+    stmt, _ = filter_listings(db, select(models.ListingCard), filters)
+    stmt = cards_in_box(stmt, geo.BoundingBox(min_lat, min_lng, max_lat, max_lng))
+    stmt = stmt.order_by(models.ListingCard.creation_datetime.desc(), models.ListingCard.listing_id.desc())
+    cards = db.execute(stmt.limit(limit)).scalars().all()
+    return json_response(schemas.map_item_list_adapter.validate_python(cards, from_attributes=True))
 
 @app.get("/api/py/businesses/{ref_id}", response_model=schemas.BusinessListing)
-def read_listing(ref_id: str, db: Session = Depends(get_db)):
-    db_listing = db.query(models.BusinessListing).filter(models.BusinessListing.ref_id == ref_id).first()
-    if db_listing is None:
-        raise HTTPException(status_code=404, detail="Listing not found")
-    return schemas.BusinessListing(**db_listing.to_dict())
+def read_listing(
+    ref_id: str,
+    request: Request,
+    fields: Optional[Tuple[str, ...]] = Depends(listing_fields),
+    db: Session = Depends(get_db),
+):
+    def build():
+        query = db.query(models.BusinessListing)
+        if fields:
+            query = query.options(load_columns(fields))
+        db_listing = query.filter(models.BusinessListing.ref_id == ref_id).first()
+        if db_listing is None:
+            raise HTTPException(status_code=404, detail="Listing not found")
+        # Only the full listing is a strong validator for If-Match
+        validators = conditional.listing_validators(
+            db_listing.id, db_listing.version, db_listing.updated_at, strong=not fields,
+        )
+        model = projection_model(fields) if fields else schemas.BusinessListing
+        return conditional.pack(to_json(model.model_validate(db_listing)), validators)
+
+    key = f"listing:{ref_id}?fields={','.join(fields)}" if fields else f"listing:{ref_id}"
+    cached = response_cache.get_or_build(key, [listing_tag(ref_id)], build)
+    cache_control = conditional.LISTING_CACHE_CONTROL if fields else conditional.EDITABLE_CACHE_CONTROL
+    return conditional.conditional_response(request, *conditional.unpack(cached), cache_control)
 
 @app.put("/api/py/businesses/{ref_id}", response_model=schemas.BusinessListing)
-def update_listing(ref_id: str, listing: schemas.BusinessListingUpdate, db: Session = Depends(get_db)):
-    db_listing = db.query(models.BusinessListing).filter(models.BusinessListing.ref_id == ref_id).first()
-    if db_listing is None:
-        raise HTTPException(status_code=404, detail="Listing not found")
-    update_data = listing.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_listing, key, value)
-    db.add(db_listing)
+def update_listing(ref_id: str, listing: schemas.BusinessListingUpdate, request: Request, response: Response, db: Session = Depends(get_db)):
+    # Send the ETag from GET /api/py/businesses/{ref_id} (without fields) or from the last PUT
+    # as If-Match to get a 409 instead of overwriting another edit
+    db_listing = apply_listing_update(
+        db, ref_id, listing.model_dump(exclude_unset=True), conditional.if_match_versions(request)
+    )
+    sync_listing_indexes(db, db_listing)
+    # Built before commit, which would expire the row and cost another SELECT
+    updated = schemas.BusinessListing(**db_listing.to_dict())
+    response.headers["ETag"] = conditional.listing_validators(
+        db_listing.id, db_listing.version, db_listing.updated_at, strong=True,
+    ).etag
     db.commit()
-    db.refresh(db_listing)
-    return schemas.BusinessListing(**db_listing.to_dict())
+    response_cache.invalidate(listing_tag(ref_id), LISTINGS_TAG)
+    return updated
 
 @app.delete("/api/py/businesses/{ref_id}", response_model=schemas.BusinessListing)
 def delete_listing(ref_id: str, db: Session = Depends(get_db)):
     db_listing = db.query(models.BusinessListing).filter(models.BusinessListing.ref_id == ref_id).first()
     if db_listing is None:
         raise HTTPException(status_code=404, detail="Listing not found")
+    remove_listing_indexes(db, db_listing.id)
     db.delete(db_listing)
     db.commit()
+    response_cache.invalidate(listing_tag(ref_id), LISTINGS_TAG)
     return schemas.BusinessListing(**db_listing.to_dict())
 
+INFO_BATCH_MAX = int(os.getenv('INFO_BATCH_MAX', '100'))
+
+def build_business_info(db_listing: models.BusinessListing) -> bytes:
+    validators = conditional.listing_validators(db_listing.id, db_listing.version, db_listing.updated_at)
+    view = schemas.BusinessInfoView.model_validate(db_listing).model_copy(
+        update=financials.listing_metrics(db_listing)
+    )
+    return conditional.pack(to_json(view), validators)
+
+@app.get("/api/py/businesses_info")
+def read_business_info_batch(
+    ref_ids: str = Query(..., description=f"Comma-separated ref_ids, at most {INFO_BATCH_MAX}"),
+    db: Session = Depends(get_db),
+):
+    # Unique ids in request order
+    requested = list(dict.fromkeys(ref_id.strip() for ref_id in ref_ids.split(",") if ref_id.strip()))
+    if len(requested) > INFO_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {INFO_BATCH_MAX} ref_ids per request")
+
+    def build(keys: List[str]) -> Dict[str, bytes]:
+        # Everything the per-listing cache did not have, in one query
+        wanted = [key.removeprefix("info:") for key in keys]
+        listings = db.query(models.BusinessListing).filter(models.BusinessListing.ref_id.in_(wanted)).all()
+        return {f"info:{listing.ref_id}": build_business_info(listing) for listing in listings}
+
+    # Shares the info:<ref_id> entries read_business_info uses
+    cached = response_cache.get_or_build_many(
+        [f"info:{ref_id}" for ref_id in requested],
+        lambda key: [listing_tag(key.removeprefix("info:"))],
+        build,
+    )
+    bodies = [conditional.unpack(cached[f"info:{ref_id}"])[0] for ref_id in requested if f"info:{ref_id}" in cached]
+    missing = [ref_id for ref_id in requested if f"info:{ref_id}" not in cached]
+    body = b'{"items":[' + b",".join(bodies) + b'],"missing":' + to_json(missing) + b"}"
+    return Response(content=body, media_type="application/json")
+
 @app.get("/api/py/businesses_info/{ref_id}", response_model=schemas.BusinessInfoView)
-def read_business_info(ref_id: str, db: Session = Depends(get_db)):
-    db_listing = db.query(models.BusinessListing).filter(models.BusinessListing.ref_id == ref_id).first()
-    if db_listing is None:
-        raise HTTPException(status_code=404, detail="Listing not found")
-    return schemas.BusinessInfoView(**db_listing.to_dict())
+def read_business_info(ref_id: str, request: Request, db: Session = Depends(get_db)):
+    def build():
+        db_listing = db.query(models.BusinessListing).filter(models.BusinessListing.ref_id == ref_id).first()
+        if db_listing is None:
+            raise HTTPException(status_code=404, detail="Listing not found")
+        return build_business_info(db_listing)
+
+    cached = response_cache.get_or_build(f"info:{ref_id}", [listing_tag(ref_id)], build)
+    return conditional.conditional_response(request, *conditional.unpack(cached))
+
+@app.get("/api/py/cache/stats")
+def read_cache_stats():
+    return response_cache.stats()
 
 
 @app.get("/api/py/test")
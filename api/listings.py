@@ -0,0 +1,83 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, false, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from api import cards
+from api import facets
+from api import models
+from api import search
+from api.ref_ids import assign_ref_ids
+
+REF_ID_ATTEMPTS = int(os.getenv('REF_ID_ATTEMPTS', '3'))
+
+# Write-side helpers shared by the single-listing endpoints and bulk import
+
+def convert_to_db_compatible(data: dict) -> dict:
+    for key, value in data.items():
+        if isinstance(value, list):
+            data[key] = json.dumps(value)
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                # If the datetime is naive, make it timezone-aware with UTC
+                data[key] = value.replace(tzinfo=timezone.utc)
+            else:
+                # If it's already timezone-aware, ensure it's in UTC
+                data[key] = value.astimezone(timezone.utc)
+    return data
+
+def insert_listing(db: Session, data: dict) -> models.BusinessListing:
+    for _ in range(REF_ID_ATTEMPTS):
+        row = dict(data)
+        assign_ref_ids(db, [row])
+        try:
+            with db.begin_nested():
+                listing = models.BusinessListing(**row)
+                db.add(listing)
+            return listing
+        except IntegrityError:
+            # The counter advanced outside the savepoint, so the next attempt gets a new suffix
+            continue
+    raise HTTPException(status_code=409, detail="Could not allocate a unique ref_id, please retry")
+
+def apply_listing_update(db: Session, ref_id: str, data: dict,
+                         expected: Optional[List[Tuple[int, int]]] = None) -> models.BusinessListing:
+    """
+    Apply data to the listing as one UPDATE ... RETURNING, bumping its version.
+    With expected (id, version) pairs from If-Match, the write only lands while the
+    listing is still at one of them; otherwise it is a 409 rather than a lost update.
+    """
+    listing = models.BusinessListing
+    stmt = update(listing).where(listing.ref_id == ref_id)
+    if expected is not None:
+        stmt = stmt.where(or_(*[and_(listing.id == id, listing.version == version) for id, version in expected])
+                          if expected else false())
+    stmt = stmt.values({**convert_to_db_compatible(data), "version": listing.version + 1})
+    stmt = stmt.execution_options(synchronize_session=False)
+
+    if db.get_bind().dialect.update_returning:
+        db_listing = db.execute(stmt.returning(listing)).scalars().first()
+    else:
+        # SQLite before 3.35 has no RETURNING; the write lock we now hold keeps the read consistent
+        updated = db.execute(stmt).rowcount
+        db_listing = db.execute(select(listing).where(listing.ref_id == ref_id)).scalar_one() if updated else None
+
+    if db_listing is None:
+        if db.execute(select(listing.id).where(listing.ref_id == ref_id)).first() is None:
+            raise HTTPException(status_code=404, detail="Listing not found")
+        raise HTTPException(status_code=409, detail="Listing was changed by someone else; reload it and try again")
+    return db_listing
+
+def sync_listing_indexes(db: Session, *listings: models.BusinessListing):
+    # Keep the derived search structures in step with written listings
+    search.index_listings(db, list(listings))
+    facets.sync_facets_many(db, list(listings))
+    cards.sync_cards(db, list(listings))
+
+def remove_listing_indexes(db: Session, listing_id: int):
+    search.remove_listing(db, listing_id)
+    facets.remove_facets(db, listing_id)
+    cards.remove_card(db, listing_id)
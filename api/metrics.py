@@ -0,0 +1,245 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Queries slower than this are logged with their statement and parameters
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_PARAMS_MAX = int(os.getenv('SLOW_QUERY_PARAMS_MAX', '500'))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REGISTRY = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Metric:
+    """A named metric with labels, rendered in the Prometheus text format."""
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def key(self, labels: dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self.samples()
+
+    def samples(self) -> list:
+        return []
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> list:
+        with self.lock:
+            values = dict(self.values)
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+class Gauge(Metric):
+    """Gauges read on scrape, from a callable registered per label set."""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.functions: Dict[Tuple, Callable[[], float]] = {}
+
+    def set_function(self, function: Callable[[], float], **labels):
+        with self.lock:
+            self.functions[self.key(labels)] = function
+
+    def samples(self) -> list:
+        with self.lock:
+            functions = dict(self.functions)
+        lines = []
+        for key, function in sorted(functions.items()):
+            try:
+                value = function()
+            except Exception:
+                continue
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self.key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def samples(self) -> list:
+        with self.lock:
+            series = {key: list(values) for key, values in self.series.items()}
+        lines = []
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                labels = _labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response, by route", ("method", "route", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("method", "route"), buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ("method", "route"),
+)
+QUERY_DURATION = Histogram("db_query_duration_seconds", "SQL statement execution time", ("operation",))
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS", ("operation",))
+DB_POOL = Gauge("db_pool_connections", "Connections in each engine's pool", ("engine", "state"))
+WS_CONNECTIONS = Gauge("ws_connections", "Open websockets on this worker", ("role",))
+WS_FANOUT = Histogram(
+    "ws_broadcast_fanout_seconds", "Time to queue a broker message to every local recipient", ("channel",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+WS_RECIPIENTS = Counter("ws_broadcast_recipients_total", "Websocket sends queued by broker messages", ("channel",))
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def server_timing(self, total: float) -> str:
+        return f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", total;dur={total * 1000:.1f}'
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def route_label(scope) -> str:
+    # The route template, so path parameters never become label values
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """Times every HTTP request and counts the SQL it runs; adds a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            route, method = route_label(scope), scope["method"]
+            REQUEST_DURATION.observe(time.perf_counter() - started, method=method, route=route, status=status)
+            REQUEST_QUERIES.observe(stats.queries, method=method, route=route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, method=method, route=route)
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return word if word in ("select", "insert", "update", "delete", "with") else "other"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    operation = _operation(statement)
+    QUERY_DURATION.observe(elapsed, operation=operation)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(operation=operation)
+        params = repr(parameters)
+        if len(params) > SLOW_QUERY_PARAMS_MAX:
+            params = params[:SLOW_QUERY_PARAMS_MAX] + "..."
+        logger.warning("Slow query (%.1f ms): %s; parameters: %s", elapsed * 1000, " ".join(statement.split()), params)
+
+def _handle_error(exception_context):
+    # after_cursor_execute never runs for a failed statement, so drop its start time here;
+    # without an execution context the statement failed before before_cursor_execute
+    conn = exception_context.connection
+    if conn is None or exception_context.execution_context is None:
+        return
+    if conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+def instrument_engine(engine, name: str):
+    """Time and count every statement run on a sync Engine, and export its pool's state."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    pool = engine.pool
+    for state in ("size", "checkedout", "checkedin"):
+        if hasattr(pool, state):
+            DB_POOL.set_function(getattr(pool, state), engine=name, state=state)
+    if hasattr(pool, "overflow"):
+        # Negative while the pool is below its size
+        DB_POOL.set_function(lambda: max(pool.overflow(), 0), engine=name, state="overflow")
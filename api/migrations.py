@@ -0,0 +1,170 @@
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, select, text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+from api import models
+from api.database import DB_TYPE, get_engine
+
+logger = logging.getLogger(__name__)
+
+# Deploys migrate out of band (python -m api.migrations); a local SQLite database
+# is brought up to date when the app starts unless this is switched off
+DB_AUTO_MIGRATE = os.getenv('DB_AUTO_MIGRATE', 'true' if DB_TYPE == 'sqlite' else 'false').lower() in ('1', 'true', 'yes')
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String),
+    Column("applied_at", DateTime(timezone=True)),
+)
+
+# (version, name, fn) - fn receives a Connection inside a transaction
+MIGRATIONS = []
+
+def migration(version: int, name: str):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+def backfill_listings(conn, fn, batch_size: int = 500):
+    # Call fn(db, listing) for every listing, walking the table in id order
+    db = Session(bind=conn)
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(models.BusinessListing)
+            .where(models.BusinessListing.id > last_id)
+            .order_by(models.BusinessListing.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not rows:
+            break
+        for listing in rows:
+            fn(db, listing)
+        last_id = rows[-1].id
+        db.expunge_all()
+    db.close()
+
+def create_missing_indexes(conn, table):
+    # create_all only builds indexes for new tables, so existing ones need this
+    # IF NOT EXISTS rather than checkfirst: reflection cannot see expression indexes
+    for index in table.indexes:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+def add_missing_columns(conn, table, *names):
+    # create_all never alters existing tables, so new model columns are added here
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        ddl = f"ALTER TABLE {table.name} ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}"
+        if column.server_default is not None:
+            ddl += f" DEFAULT {column.server_default.arg}"
+        conn.execute(text(ddl))
+
+@migration(3, "keyset pagination index on business listings")
+def create_listing_keyset_index(conn):
+    create_missing_indexes(conn, models.BusinessListing.__table__)
+
+@migration(4, "conversation history index")
+def create_conversation_history_index(conn):
+    create_missing_indexes(conn, models.Conversation.__table__)
+
+@migration(5, "listing version and updated_at")
+def add_listing_version(conn):
+    listings = models.BusinessListing.__table__
+    add_missing_columns(conn, listings, "updated_at", "version")
+    conn.execute(
+        update(listings)
+        .where(listings.c.updated_at.is_(None))
+        .values(updated_at=listings.c.creation_datetime)
+    )
+
+@migration(6, "range filter and sort indexes on business listings")
+def create_listing_range_indexes(conn):
+    create_missing_indexes(conn, models.BusinessListing.__table__)
+
+@migration(10, "own primary key for archived conversations")
+def add_archive_source_id(conn):
+    archive = models.ConversationArchive.__table__
+    add_missing_columns(conn, archive, "source_id")
+    # Archive ids used to be the live ids; keep them as the source and the row's own id
+    conn.execute(update(archive).where(archive.c.source_id.is_(None)).values(source_id=archive.c.id))
+    create_missing_indexes(conn, archive)
+    if conn.dialect.name == "postgresql":
+        # The serial sequence was never used while ids were copied in explicitly
+        conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('conversations_archive', 'id'), "
+            "COALESCE(MAX(id), 0) + 1, false) FROM conversations_archive"
+        ))
+
+def _load_migrations():
+    # Importing registers the migrations owned by each module
+    from api import cards, facets, search  # noqa: F401
+
+def pending_migrations(bind=None) -> list:
+    _load_migrations()
+    bind = bind or get_engine()
+    applied = set()
+    if inspect(bind).has_table(schema_migrations.name):
+        with bind.connect() as conn:
+            applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+    return [m for m in sorted(MIGRATIONS, key=lambda m: m[0]) if m[0] not in applied]
+
+def add_model_columns(conn):
+    # Backfills load whole ORM entities, so every model column has to exist before
+    # any migration runs, including columns a later migration formally adds
+    existing_tables = set(inspect(conn).get_table_names())
+    for table in models.Base.metadata.sorted_tables:
+        if table.name in existing_tables:
+            add_missing_columns(conn, table, *table.c.keys())
+
+def run_migrations(bind=None):
+    bind = bind or get_engine()
+    schema_migrations.create(bind, checkfirst=True)
+    pending = pending_migrations(bind)
+    if pending:
+        with bind.begin() as conn:
+            add_model_columns(conn)
+    for version, name, fn in pending:
+        logger.info(f"Applying migration {version}: {name}")
+        with bind.begin() as conn:
+            fn(conn)
+            conn.execute(insert(schema_migrations).values(
+                version=version,
+                name=name,
+                applied_at=datetime.now(timezone.utc),
+            ))
+
+def migrate(bind=None):
+    """Bring the schema up to date: create missing tables, then apply pending migrations."""
+    bind = bind or get_engine()
+    models.Base.metadata.create_all(bind=bind)
+    run_migrations(bind)
+
+def main():
+    parser = argparse.ArgumentParser(description="Create missing tables and apply pending schema migrations.")
+    parser.add_argument("--check", action="store_true", help="only list pending migrations; exit 1 if there are any")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.check:
+        pending = pending_migrations()
+        for version, name, _ in pending:
+            print(f"Pending migration {version}: {name}")
+        sys.exit(1 if pending else 0)
+    migrate()
+
+if __name__ == "__main__":
+    # Run through the importable module so migrations register on the same registry
+    from api import migrations
+    migrations.main()
@@ -1,6 +1,7 @@
 import json
-from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.sqlite import JSON
+from sqlalchemy.orm import synonym
 from api.database import Base
 from datetime import date, datetime, timezone
 
@@ -11,7 +12,28 @@ class Conversation(Base):
     user_email = Column(String, index=True)
     message = Column(String)
     sender = Column(String)  # 'user' or 'admin'
-    timestamp = Column(DateTime, default=datetime.now(timezone.utc))
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("ix_conversations_user_email_timestamp", "user_email", "timestamp"),
+    )
+
+class ConversationArchive(Base):
+    __tablename__ = "conversations_archive"
+
+    # Messages moved out of conversations by api/retention.py. The live table reuses ids
+    # once its newest rows are archived, so the original id is kept in source_id
+    id = Column(Integer, primary_key=True)
+    source_id = Column(Integer, index=True)
+    user_email = Column(String)
+    message = Column(String)
+    sender = Column(String)
+    timestamp = Column(DateTime)
+    archived_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("ix_conversations_archive_user_email_timestamp", "user_email", "timestamp"),
+    )
 
 class BusinessListing(Base):
     __tablename__ = "business_listings"
@@ -23,6 +45,8 @@ class BusinessListing(Base):
     business_name = Column(String)
     availability = Column(String)
     creation_datetime = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # bumped on every write
 
     # Business Overview
     business_type = Column(String)
@@ -37,6 +61,8 @@ class BusinessListing(Base):
     business_situs = Column(String)
     business_situs_owner_type = Column(String)
     size = Column(Float)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
 
     # Financial Information
     price = Column(Float)
@@ -90,6 +116,11 @@ class BusinessListing(Base):
     # Additional Information
     description = Column(JSON)  # List[str]
 
+    __table_args__ = (
+        # Keyset pagination walks listings newest first on (creation_datetime, id)
+        Index("ix_business_listings_created_id", "creation_datetime", "id"),
+    )
+
     def to_dict(self):
         def format_datetime(value):
             if isinstance(value, datetime):
@@ -131,6 +162,8 @@ class BusinessListing(Base):
             "business_situs": self.business_situs,
             "business_situs_owner_type": self.business_situs_owner_type,
             "size": self.size,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
             "price": self.price,
             "min_price": self.min_price,
             "price_include_inventory": self.price_include_inventory,
@@ -169,3 +202,72 @@ class BusinessListing(Base):
             "description": safe_json_loads(self.description),
         }
 
+
+class ListingFacet(Base):
+    __tablename__ = "listing_facets"
+
+    # One row per (listing, facet, value) so facet filters are exact index lookups
+    listing_id = Column(Integer, ForeignKey("business_listings.id", ondelete="CASCADE"), primary_key=True)
+    facet = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_listing_facets_facet_value", "facet", "value", "listing_id"),
+    )
+
+class ListingCard(Base):
+    __tablename__ = "listing_cards"
+
+    # Narrow copy of each listing for the card/search views, rewritten on every listing write
+    listing_id = Column(Integer, ForeignKey("business_listings.id", ondelete="CASCADE"), primary_key=True)
+    id = synonym("listing_id")
+    ref_id = Column(String, nullable=False)
+    title = Column(String)
+    location = Column(String)
+    district_code = Column(String)  # code after "-" in location, e.g. "WC"
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String)  # see api/geo.py
+    # Stored as real JSON arrays, not the JSON-encoded strings business_listings keeps
+    label = Column(JSON)
+    involvement = Column(JSON)
+    industry = Column(JSON)
+    search_text = Column(String)  # lowercased ref_id, title, business name, location and industry
+    size = Column(Float)
+    price = Column(Float)
+    turnover = Column(Float)
+    profit = Column(Float)
+    rent = Column(Float)
+    number_of_staff = Column(Integer)
+    # Derived figures from api/financials.py, stored so they can be filtered and sorted on
+    profit_margin = Column(Float, nullable=False)  # 0 when there is no turnover
+    payback_months = Column(Float)  # price / monthly profit; NULL when profit is not positive
+    monthly_cost = Column(Float)
+    creation_datetime = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    version = Column(Integer)
+
+    __table_args__ = (
+        # Sorts and range filters; listing_id is the sort tiebreaker
+        Index("ix_listing_cards_created_id", "creation_datetime", "listing_id"),
+        Index("ix_listing_cards_price_id", "price", "listing_id"),
+        Index("ix_listing_cards_turnover_id", "turnover", "listing_id"),
+        Index("ix_listing_cards_profit_id", "profit", "listing_id"),
+        Index("ix_listing_cards_size_id", "size", "listing_id"),
+        Index("ix_listing_cards_margin_id", "profit_margin", "listing_id"),
+        Index("ix_listing_cards_payback_id", "payback_months", "listing_id"),
+        Index("ix_listing_cards_monthly_cost_id", "monthly_cost", "listing_id"),
+        # Price-range browsing usually narrows by profit or turnover too; both are read from the index
+        Index("ix_listing_cards_price_profit_turnover", "price", "profit", "turnover"),
+        Index("ix_listing_cards_rent_size", "rent", "size"),
+        Index("ix_listing_cards_staff", "number_of_staff"),
+        Index("ix_listing_cards_district_created", "district_code", "creation_datetime", "listing_id"),
+        Index("ix_listing_cards_geohash", "geohash"),
+    )
+
+class RefIdCounter(Base):
+    __tablename__ = "ref_id_counters"
+
+    # Last suffix handed out per location code; see api/ref_ids.py
+    scope = Column(String, primary_key=True)
+    last_value = Column(Integer, nullable=False)
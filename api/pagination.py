@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import List, NamedTuple, Optional
+from sqlalchemy import and_, or_
+
+class SortKey(NamedTuple):
+    name: str
+    column: object
+    descending: bool = False
+    nullable: bool = False  # NULLs sort last in either direction
+
+class InvalidCursor(ValueError):
+    pass
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return {"$dt": value.isoformat()}
+    return value
+
+def _from_json(value):
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+def encode_cursor(sort: str, values: list) -> str:
+    payload = json.dumps({"s": sort, "v": [_to_json(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_from_json(v) for v in payload["v"]]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    # A cursor only makes sense for the ordering it was issued under
+    if payload.get("s") != sort or len(values) != size:
+        raise InvalidCursor("Cursor does not match the requested sort order")
+    return values
+
+def keyset_condition(keys: List[SortKey], values: list):
+    # (k1, k2, ...) strictly after values, honouring each key's direction
+    clauses = []
+    for i, key in enumerate(keys):
+        equal = [keys[j].column == values[j] for j in range(i)]
+        if values[i] is None:
+            # Only NULLs follow a NULL, and they tie on this key
+            continue
+        after = key.column < values[i] if key.descending else key.column > values[i]
+        if key.nullable:
+            after = or_(after, key.column.is_(None))
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
+
+def order_by(key: SortKey):
+    order = key.column.desc() if key.descending else key.column.asc()
+    return order.nulls_last() if key.nullable else order
+
+def page_statement(stmt, keys: List[SortKey], sort: str, limit: int, cursor: Optional[str] = None, skip: int = 0):
+    """
+    stmt ordered by keys and positioned at the requested page, fetching one extra row
+    so callers can tell whether another page follows.
+
+    With a cursor the page starts strictly after the cursor position, so deep pages
+    are an index seek; without one, skip falls back to an OFFSET for older clients.
+    The sort key values are appended to each row as extra columns.
+    """
+    stmt = stmt.add_columns(*[key.column.label(f"_sort_{key.name}") for key in keys])
+    stmt = stmt.order_by(*[order_by(key) for key in keys])
+    if cursor:
+        stmt = stmt.where(keyset_condition(keys, decode_cursor(cursor, sort, len(keys))))
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit + 1)
+
+def row_cursor(sort: str, keys: List[SortKey], row) -> str:
+    return encode_cursor(sort, list(row[-len(keys):]))
+
+def paginate(db, stmt, keys: List[SortKey], sort: str, limit: int, cursor: Optional[str] = None, skip: int = 0):
+    """Run stmt ordered by keys and return (rows, next_cursor); see page_statement."""
+    rows = db.execute(page_statement(stmt, keys, sort, limit, cursor=cursor, skip=skip)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = row_cursor(sort, keys, rows[-1])
+    return rows, next_cursor
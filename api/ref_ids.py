@@ -0,0 +1,56 @@
+import re
+from collections import defaultdict
+from datetime import datetime, time, timezone
+from typing import Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from api import models
+
+def location_code(location: str) -> str:
+    # Extract uppercase letters after "-" from location
+    code = re.findall(r'-\s*([A-Z]+)', location or "")
+    return code[0] if code else ''
+
+def ref_id_prefix(location: str, now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    # Make midnight timezone-aware
+    midnight = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+    minutes_since_midnight = int((now - midnight).total_seconds() / 60)
+
+    year_last_two_digits = str(now.year)[-2:]
+    week_number = now.strftime("%W")
+    day_number = now.strftime("%w")
+
+    # Format minutes as a 4-digit string
+    return f"{location_code(location)}{year_last_two_digits}{week_number}{day_number}{minutes_since_midnight:04d}"
+
+def reserve(db: Session, scope: str, count: int = 1) -> int:
+    """Atomically advance the counter for scope by count and return its new value."""
+    dialect = db.get_bind().dialect.name
+    upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    counter = models.RefIdCounter
+    stmt = upsert(counter).values(scope=scope, last_value=count)
+    # Single statement, so concurrent workers never see the same value
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[counter.scope],
+        set_={"last_value": counter.last_value + count},
+    )
+    if db.get_bind().dialect.insert_returning:
+        return db.execute(stmt.returning(counter.last_value)).scalar_one()
+    # SQLite before 3.35 has no RETURNING; the upsert holds the write lock, so reading
+    # the counter back in the same transaction still sees only this worker's value
+    db.execute(stmt)
+    return db.execute(select(counter.last_value).where(counter.scope == scope)).scalar_one()
+
+def assign_ref_ids(db: Session, rows: Iterable[dict]):
+    """Set ref_id on each row dict, reserving one block of suffixes per location code."""
+    now = datetime.now(timezone.utc)
+    by_scope = defaultdict(list)
+    for row in rows:
+        by_scope[location_code(row.get("location"))].append(row)
+
+    for scope, scoped in by_scope.items():
+        last = reserve(db, scope, len(scoped))
+        for sequence, row in enumerate(scoped, start=last - len(scoped) + 1):
+            row["ref_id"] = f"{ref_id_prefix(row.get('location'), now)}-{sequence}"
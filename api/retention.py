@@ -0,0 +1,62 @@
+"""
+Moves chat messages older than the retention window from conversations into
+conversations_archive, in batches so the live table is never locked for long.
+
+    python -m api.retention --days 90 --batch-size 1000
+"""
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert, literal, select
+from api import models
+from api.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+CHAT_RETENTION_DAYS = int(os.getenv('CHAT_RETENTION_DAYS', '90'))
+CHAT_ARCHIVE_BATCH_SIZE = int(os.getenv('CHAT_ARCHIVE_BATCH_SIZE', '1000'))
+
+def archive_batch(conn, cutoff: datetime, batch_size: int) -> int:
+    conv = models.Conversation
+    ids = conn.execute(
+        select(conv.id).where(conv.timestamp < cutoff).order_by(conv.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+    archived_at = literal(datetime.now(timezone.utc), models.ConversationArchive.archived_at.type)
+    conn.execute(insert(models.ConversationArchive).from_select(
+        ["source_id", "user_email", "message", "sender", "timestamp", "archived_at"],
+        select(conv.id, conv.user_email, conv.message, conv.sender, conv.timestamp, archived_at)
+        .where(conv.id.in_(ids)),
+    ))
+    conn.execute(delete(conv).where(conv.id.in_(ids)))
+    return len(ids)
+
+def archive_conversations(bind=None, days: int = CHAT_RETENTION_DAYS, batch_size: int = CHAT_ARCHIVE_BATCH_SIZE) -> int:
+    # Conversation timestamps are stored naive, in UTC
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).replace(tzinfo=None)
+    bind = bind or get_engine()
+    moved = 0
+    while True:
+        # One short transaction per batch: copy, then delete the same ids
+        with bind.begin() as conn:
+            count = archive_batch(conn, cutoff, batch_size)
+        if not count:
+            break
+        moved += count
+        logger.info(f"Archived {moved} messages older than {cutoff.isoformat()}")
+    return moved
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=CHAT_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=CHAT_ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    models.Base.metadata.create_all(bind=get_engine(), tables=[models.ConversationArchive.__table__])
+    print(f"Archived {archive_conversations(days=args.days, batch_size=args.batch_size)} messages")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,27 @@
-from pydantic import BaseModel, Field, ConfigDict, computed_field
-from typing import List, Optional
-from datetime import datetime, date, time, timezone
-import re
+from pydantic import AfterValidator, BaseModel, BeforeValidator, Field, ConfigDict, TypeAdapter
+from typing import Annotated, Generic, List, Optional, TypeVar
+from datetime import datetime, date, timezone
+import json
+
+def decode_json_list(value):
+    # List columns are stored JSON-encoded; decode them so models can load straight from ORM rows
+    if value is None:
+        return []
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return [value] if value else []
+    return value
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+StrList = Annotated[List[str], BeforeValidator(decode_json_list)]
+FloatList = Annotated[List[float], BeforeValidator(decode_json_list)]
+UtcDatetime = Annotated[datetime, AfterValidator(as_utc)]
 
 class ConversationCreate(BaseModel):
     user_email: str
@@ -18,33 +38,13 @@ class Conversation(BaseModel):
     class Config:
         orm_mode = True
 
-def generate_ref_id(location: str):
-    now = datetime.now(timezone.utc)
-    # Make midnight timezone-aware
-    midnight = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
-    minutes_since_midnight = int((now - midnight).total_seconds() / 60)
-
-    year_last_two_digits = str(now.year)[-2:]
-    week_number = now.strftime("%W")
-    day_number = now.strftime("%w")
-
-    # Format minutes as a 4-digit string
-    minutes_str = f"{minutes_since_midnight:04d}"
-
-    # Extract uppercase letters after "-" from location
-    location_code = re.findall(r'-\s*([A-Z]+)', location)
-    location_code = location_code[0] if location_code else ''
-    ref_id = f"{location_code}{year_last_two_digits}{week_number}{day_number}{minutes_str}"
-    print(ref_id)
-    return ref_id
-
 class BusinessListingBase(BaseModel):
     title: str
     business_name: str
     availability: str
     business_type: str
-    industry: List[str]
-    label: List[str]
+    industry: StrList
+    label: StrList
     foundation_date: date
     number_of_partners: int
     location: str
@@ -52,6 +52,8 @@ class BusinessListingBase(BaseModel):
     business_situs: str
     business_situs_owner_type: str
     size: float
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     price: float
     min_price: float
     price_include_inventory: bool
@@ -73,28 +75,24 @@ class BusinessListingBase(BaseModel):
     staff_salary: float
     staff_remain: str
     mpf: float
-    main_product_service: List[str]
-    main_product_service_percentage: List[float]
+    main_product_service: StrList
+    main_product_service_percentage: FloatList
     business_hours: str
-    license: List[str]
+    license: StrList
     lease_term: float
     lease_expiry_date: date
-    transfer_method: List[str]
-    reason: List[str]
-    involvement: List[str]
+    transfer_method: StrList
+    reason: StrList
+    involvement: StrList
     agent: str
     client_name: str
     mobile: str
     email: str
     meeting_location: str
-    description: List[str]
+    description: StrList
 
 class BusinessListingCreate(BusinessListingBase):
-    @computed_field
-    @property
-    def ref_id(self) -> str:
-        return generate_ref_id(self.location)
-    
+    # ref_id is assigned once, at insert time, by api.ref_ids
     class Config:
         json_encoders = {
             datetime: lambda dt: dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
@@ -103,13 +101,13 @@ class BusinessListingCreate(BusinessListingBase):
 class BusinessListing(BusinessListingBase):
     id: int
     ref_id: str
-    creation_datetime: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    creation_datetime: UtcDatetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     model_config = ConfigDict(from_attributes = True)
 
 class BusinessListingResponse(BusinessListingBase):
     id: int
     ref_id: str
-    creation_datetime: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    creation_datetime: UtcDatetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     model_config = ConfigDict(from_attributes=True)
 class BusinessListingUpdate(BaseModel):
     title: Optional[str] = None
@@ -125,6 +123,8 @@ class BusinessListingUpdate(BaseModel):
     business_situs: Optional[str] = None
     business_situs_owner_type: Optional[str] = None
     size: Optional[float] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     price: Optional[float] = None
     min_price: Optional[float] = None
     price_include_inventory: Optional[bool] = None
@@ -170,32 +170,57 @@ class BusinessListingInDB(BusinessListing):
 class BusinessItemView(BaseModel):
     ref_id: str
     title: str
-    label: List[str]
-    involvement: List[str]
-    industry: List[str]
+    label: StrList
+    involvement: StrList
+    industry: StrList
     location: str
     size: float
     price: float
     turnover: float
+    profit_margin: Optional[float] = None
+    payback_months: Optional[float] = None
+    monthly_cost: Optional[float] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+class BusinessMapItem(BusinessItemView):
+    district_code: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+class NearbyItem(BusinessMapItem):
+    distance_km: float
+
 class BusinessInfoView(BaseModel):
     ref_id: str
     title: str
-    label: List[str]
-    involvement: List[str]
-    industry: List[str]
+    label: StrList
+    involvement: StrList
+    industry: StrList
     location: str
     business_situs: str
     size: float
     price: float
     turnover: float
-    transfer_method: List[str]
+    transfer_method: StrList
     profit: float
-    reason: List[str]
-    license: List[str]
+    reason: StrList
+    license: StrList
     rent: float
-    description: List[str]
+    description: StrList
+    profit_margin: Optional[float] = None
+    payback_months: Optional[float] = None
+    monthly_cost: Optional[float] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+# Precompiled adapters for the list endpoints: validate from ORM attributes, dump straight to JSON bytes
+listing_list_adapter = TypeAdapter(List[BusinessListing])
+item_list_adapter = TypeAdapter(List[BusinessItemView])
+map_item_list_adapter = TypeAdapter(List[BusinessMapItem])
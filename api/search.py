@@ -0,0 +1,113 @@
+import re
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, literal_column, select, text
+from sqlalchemy.orm import Session
+from api import models
+from api.migrations import backfill_listings, migration
+
+# Columns covered by the full-text index, with their ranking weights
+SEARCH_COLUMNS = {
+    "title": 10.0,
+    "business_name": 5.0,
+    "industry": 3.0,
+    "main_product_service": 2.0,
+    "description": 1.0,
+}
+
+# Postgres only has four weight classes, so map the columns onto them
+PG_WEIGHTS = {
+    "title": "A",
+    "business_name": "B",
+    "industry": "B",
+    "main_product_service": "C",
+    "description": "D",
+}
+
+FTS_TABLE = "business_listings_fts"
+
+fts_table = Table(
+    FTS_TABLE,
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    *[Column(name, String) for name in SEARCH_COLUMNS],
+)
+
+def _is_postgres(db) -> bool:
+    bind = db.get_bind() if isinstance(db, Session) else db
+    return bind.dialect.name == "postgresql"
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return str(value)
+
+def search_document(listing: models.BusinessListing) -> dict:
+    # Index the decoded values so JSON punctuation never becomes searchable
+    data = listing.to_dict()
+    return {name: _as_text(data[name]) for name in SEARCH_COLUMNS}
+
+def keyword_tokens(keyword: str) -> list:
+    return re.findall(r"\w+", keyword or "")
+
+def index_listings(db, listings: list):
+    if not listings:
+        return
+    params = [{"id": listing.id, **search_document(listing)} for listing in listings]
+    if _is_postgres(db):
+        vector = " || ".join(
+            f"setweight(to_tsvector('simple', :{name}), '{PG_WEIGHTS[name]}')" for name in SEARCH_COLUMNS
+        )
+        db.execute(text(f"UPDATE business_listings SET search_vector = {vector} WHERE id = :id"), params)
+    else:
+        columns = ", ".join(SEARCH_COLUMNS)
+        values = ", ".join(f":{name}" for name in SEARCH_COLUMNS)
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{"id": p["id"]} for p in params])
+        db.execute(text(f"INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (:id, {values})"), params)
+
+def index_listing(db, listing: models.BusinessListing):
+    index_listings(db, [listing])
+
+def remove_listing(db, listing_id: int):
+    # On Postgres the vector lives on the row itself and goes away with it
+    if not _is_postgres(db):
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": listing_id})
+
+def match_subquery(db, keyword: str):
+    """Return a subquery of (listing_id, rank) for listings matching keyword; lower rank is better."""
+    tokens = keyword_tokens(keyword)
+    if not tokens:
+        return None
+
+    if _is_postgres(db):
+        search_vector = literal_column("business_listings.search_vector")
+        tsquery = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        return select(
+            models.BusinessListing.id.label("listing_id"),
+            (-func.ts_rank_cd(search_vector, tsquery)).label("rank"),
+        ).where(search_vector.op("@@")(tsquery)).subquery("search_match")
+
+    fts_query = " ".join('"{}"*'.format(token) for token in tokens)
+    return select(
+        fts_table.c.rowid.label("listing_id"),
+        func.bm25(literal_column(FTS_TABLE), *SEARCH_COLUMNS.values()).label("rank"),
+    ).where(text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=fts_query)).subquery("search_match")
+
+def reindex_all(conn):
+    backfill_listings(conn, index_listing)
+
+@migration(1, "full-text search index for business listings")
+def create_search_index(conn):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE business_listings ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_business_listings_search_vector "
+            "ON business_listings USING GIN (search_vector)"
+        ))
+    else:
+        columns = ", ".join(SEARCH_COLUMNS)
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+        ))
+    reindex_all(conn)
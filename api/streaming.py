@@ -0,0 +1,60 @@
+import os
+from typing import Iterator, List
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from api.database import SessionLocal
+from api.pagination import SortKey, row_cursor
+
+STREAM_YIELD_PER = int(os.getenv('STREAM_YIELD_PER', '500'))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+def stream_page(
+    stmt,
+    keys: List[SortKey],
+    sort: str,
+    limit: int,
+    adapter: TypeAdapter,
+    format: str,
+    envelope: bool = False,
+) -> Iterator[bytes]:
+    """
+    Serialize a page_statement() of ORM rows as it is read, STREAM_YIELD_PER rows at a time.
+
+    "ndjson" writes one object per line; with envelope a final {"next_cursor"}
+    line follows the items. "json" writes the same body the buffered endpoint
+    would: a bare array, or with envelope the {"items", "next_cursor"} object,
+    next_cursor written after the last item.
+    """
+    if format == "json":
+        yield b'{"items":[' if envelope else b"["
+
+    # Own session: the generator outlives the request's dependencies
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=STREAM_YIELD_PER))
+        sent, last, more = 0, None, False
+        for partition in result.partitions():
+            # page_statement reads one row past the page to detect a next page
+            if sent + len(partition) > limit:
+                partition, more = partition[:limit - sent], True
+            if not partition:
+                break
+            items = adapter.validate_python([row[0] for row in partition], from_attributes=True)
+            if format == "ndjson":
+                yield b"".join(to_json(item) + b"\n" for item in items)
+            else:
+                yield (b"," if sent else b"") + b",".join(to_json(item) for item in items)
+            sent += len(partition)
+            # Only the last row is kept; the session's identity map is weak, so earlier
+            # partitions are freed as soon as they are written
+            last = partition[-1]
+
+    next_cursor = row_cursor(sort, keys, last) if more and last is not None else None
+    if format == "ndjson":
+        if envelope:
+            yield b'{"next_cursor":' + to_json(next_cursor) + b"}\n"
+    else:
+        yield b'],"next_cursor":' + to_json(next_cursor) + b"}" if envelope else b"]"
@@ -24,6 +24,7 @@ export default function AdminDashboard() {
   const [page, setPage] = useState(1);
   const [editingId, setEditingId] = useState<string | null>(null);
   const [editingData, setEditingData] = useState<AdminFormIfc | null>(null);
+  const [editingEtag, setEditingEtag] = useState<string | null>(null);
   const [expandedIds, setExpandedIds] = useState<Set<string>>(new Set());
   const [expandedBusinesses, setExpandedBusinesses] = useState<Map<string, BizSchema>>(new Map());
 
@@ -65,10 +66,16 @@ export default function AdminDashboard() {
             method: "PUT",
             headers: {
               "Content-Type": "application/json",
+              // Rejected with 409 if someone else saved this listing since it was loaded
+              ...(editingEtag ? { "If-Match": editingEtag } : {}),
             },
             body: JSON.stringify(formData),
           }
         );
+        if (response.status === 409) {
+          alert("This business was changed by someone else while you were editing. Reopen it to see their changes.");
+          return;
+        }
         if (response.ok) {
           const updatedBusiness = await response.json();
           console.log("Business updated:", updatedBusiness);
@@ -91,6 +98,7 @@ export default function AdminDashboard() {
 
           setEditingId(null);
           setEditingData(null);
+          setEditingEtag(null);
         } else {
           throw new Error("Failed to update business");
         }
@@ -123,10 +131,13 @@ export default function AdminDashboard() {
       // Cancel editing
       setEditingId(null);
       setEditingData(null);
+      setEditingEtag(null);
     } else {
       try {
+        // Revalidate rather than reuse a cached copy, so the ETag is current
         const response = await fetch(
-          `${BACKEND_URL}/api/py/businesses/${ref_id}`
+          `${BACKEND_URL}/api/py/businesses/${ref_id}`,
+          { cache: "no-cache" }
         );
         if (!response.ok) {
           throw new Error("Failed to fetch business data");
@@ -134,6 +145,7 @@ export default function AdminDashboard() {
         const businessData = await response.json();
         setEditingId(ref_id);
         setEditingData(businessData);
+        setEditingEtag(response.headers.get("ETag"));
       } catch (error) {
         console.error("Error fetching business data:", error);
         alert("Failed to fetch business data for editing.");
@@ -10,12 +10,14 @@ import { faHeart as fasHeart } from '@fortawesome/free-solid-svg-icons';
 import { useFavorites } from '../components/FavoritesContext';
 interface BusinessItemProps {
   business: BusinessItemViewIfc;
+  // Already-loaded details (e.g. from a batch lookup) so expanding needs no request
+  info?: BusinessInfoViewIfc;
   delay: number;
 }
 
-export const BusinessItem: React.FC<BusinessItemProps> = ({ business, delay }) => {
+export const BusinessItem: React.FC<BusinessItemProps> = ({ business, info, delay }) => {
   const [isExpanded, setIsExpanded] = useState(false);
-  const [businessInfo, setBusinessInfo] = useState<BusinessInfoViewIfc | null>(null);
+  const [businessInfo, setBusinessInfo] = useState<BusinessInfoViewIfc | null>(info ?? null);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const { favorites, toggleFavorite } = useFavorites();
@@ -1,6 +1,6 @@
 'use client';
 import React, { useState, useEffect } from 'react';
-import { BusinessItemViewIfc } from '@/app/types/ifc';
+import { BusinessItemViewIfc, BusinessInfoViewIfc } from '@/app/types/ifc';
 import { BusinessItem } from '@/app/displays/bizitem';
 import Cookies from 'js-cookie';
 import { BACKEND_URL } from '@/app/types/config';
@@ -8,8 +8,12 @@ import Link from 'next/link';
 import PageHeader from '../components/PageHeader';
 import BuyerFormComponent from '../forms/buyer/page';
 
+// Matches the backend's default INFO_BATCH_MAX
+const INFO_BATCH_MAX = 100;
+
 export default function FavoritesPage() {
-  const [favorites, setFavorites] = useState<BusinessItemViewIfc[]>([]);
+  // The batch endpoint returns full info views, which also cover the card fields
+  const [favorites, setFavorites] = useState<(BusinessItemViewIfc & BusinessInfoViewIfc)[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -20,7 +24,7 @@ export default function FavoritesPage() {
   const fetchFavorites = async () => {
     setIsLoading(true);
     setError(null);
-    const favoriteIds = JSON.parse(Cookies.get('favorites') || '[]');
+    const favoriteIds: string[] = Array.from(new Set(JSON.parse(Cookies.get('favorites') || '[]')));
     
     if (favoriteIds.length === 0) {
       setFavorites([]);
@@ -29,17 +33,27 @@ export default function FavoritesPage() {
     }
 
     try {
-      const fetchedFavorites = await Promise.all(
-        favoriteIds.map(async (id: string) => {
-          const response = await fetch(`${BACKEND_URL}/api/py/businesses_info/${id}`);
-          if (!response.ok) {
-            throw new Error(`Failed to fetch business info for ID: ${id}`);
-          }
-          return response.json();
-        })
-      );
+      // The batch endpoint takes at most INFO_BATCH_MAX ids, so larger lists go in several requests;
+      // listings that no longer exist come back in "missing"
+      const batches: string[][] = [];
+      for (let i = 0; i < favoriteIds.length; i += INFO_BATCH_MAX) {
+        batches.push(favoriteIds.slice(i, i + INFO_BATCH_MAX));
+      }
+      const results = await Promise.all(batches.map(async (batch) => {
+        const params = new URLSearchParams({ ref_ids: batch.join(',') });
+        const response = await fetch(`${BACKEND_URL}/api/py/businesses_info?${params}`);
+        if (!response.ok) {
+          throw new Error(`Failed to fetch business info: ${response.status}`);
+        }
+        return response.json();
+      }));
+      const items = results.flatMap((result) => result.items);
+      const missing = results.flatMap((result) => result.missing);
+      if (missing.length > 0) {
+        console.warn('Favorites no longer listed:', missing);
+      }
 
-      setFavorites(fetchedFavorites);
+      setFavorites(items);
     } catch (error) {
       console.error('Error fetching favorites:', error);
       setError('Failed to load some favorites. Please try again later.');
@@ -68,6 +82,7 @@ export default function FavoritesPage() {
             <BusinessItem 
               key={business.ref_id} 
               business={business} 
+              info={business}
               delay={0.1 * index}
             />
           ))}
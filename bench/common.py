@@ -0,0 +1,72 @@
+"""Shared helpers for the load benchmarks: latency summaries, JSON reports and a local server."""
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from contextlib import contextmanager, redirect_stdout
+from typing import List, Optional
+
+def distribution(samples_ms: List[float]) -> dict:
+    ordered = sorted(samples_ms)
+    if len(ordered) >= 2:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ordered[0] if ordered else None
+    return {
+        "p50": _round(p50),
+        "p95": _round(p95),
+        "p99": _round(p99),
+        "mean": _round(statistics.fmean(ordered)) if ordered else None,
+        "max": _round(ordered[-1]) if ordered else None,
+    }
+
+def latency_summary(samples_ms: List[float], elapsed_s: float, errors: int = 0) -> dict:
+    return {
+        "requests": len(samples_ms) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed_s, 3),
+        "throughput_rps": round(len(samples_ms) / elapsed_s, 1) if elapsed_s else None,
+        "latency_ms": distribution(samples_ms),
+    }
+
+def _round(value: Optional[float]):
+    return round(value, 2) if value is not None else None
+
+def write_report(report: dict, output: Optional[str] = None):
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextmanager
+def local_server(app: str = "api.index:app"):
+    """
+    Run app under uvicorn on a free local port in a background thread; yields its base URL.
+    The app's print output is discarded while it runs so it cannot interleave with the report.
+    """
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        thread.start()
+        deadline = time.monotonic() + 30
+        while not server.started:
+            if not thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.05)
+        try:
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            server.should_exit = True
+            thread.join(timeout=30)
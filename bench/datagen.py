@@ -0,0 +1,137 @@
+"""
+Seeded synthetic data for the load benchmarks.
+
+Listings go through the same chunked insert as the bulk import endpoint, so ref
+ids, search, facets and listing cards are all populated; conversations are
+spread over the last --days days across --users users. The same --seed always
+yields the same rows (ref ids still carry the time they were generated).
+
+Point it at a scratch database, e.g. SQLITE_PATH=/tmp/bench.db or DB_TYPE=postgresql:
+
+    SQLITE_PATH=/tmp/bench.db python -m bench.datagen --listings 10000 --conversations 100000
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import insert
+from api import models, schemas
+from api.bulk import insert_chunk
+from api.database import SessionLocal, get_engine
+from api.migrations import migrate
+from bench.common import write_report
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+LOCATIONS = [
+    "Central - CL", "Wan Chai - WC", "Causeway Bay - CWB", "North Point - NP", "Aberdeen - ABD",
+    "Tsim Sha Tsui - TST", "Yau Ma Tei - YMT", "Mong Kok - MK", "Sham Shui Po - SSP", "Kowloon Bay - KLW",
+    "Kwun Tong - KT", "Tsuen Wan - TW", "Kwai Chung - KC", "Yuen Long - YL", "Tuen Mun - TM",
+    "Tai Po - TP", "Sha Tin - ST", "Sai Kung - SK", "Tseung Kwan O - TKO", "Outlying Islands - IL",
+]
+INDUSTRIES = [
+    "Food and beverage", "Retail", "Beauty", "Education", "Fitness", "Logistics",
+    "Technology", "Healthcare", "Seafood", "Bakery", "Laundry", "Pet care",
+]
+LABELS = ["Hot", "New", "Reduced", "Featured"]
+INVOLVEMENT = ["Full Time", "Part Time", "Passive"]
+WORDS = [
+    "cosy", "busy", "corner", "family", "modern", "established", "profitable", "quiet",
+    "espresso", "noodle", "salon", "studio", "bakery", "florist", "gym", "tutoring",
+]
+CHAT_LINES = [
+    "Is this business still available?", "Can I arrange a viewing?", "What is the lease term?",
+    "Are the staff staying on?", "Could you share the accounts?", "Is the price negotiable?",
+]
+
+def parse_size(value: str) -> int:
+    return SIZES.get(value.lower()) or int(value)
+
+def make_listing(rng: random.Random, i: int) -> dict:
+    location = rng.choice(LOCATIONS)
+    turnover = round(rng.uniform(50_000, 2_000_000), -2)
+    profit = round(turnover * rng.uniform(-0.1, 0.4), -2)
+    words = rng.sample(WORDS, 3)
+    # A quarter of listings have no coordinates, as older ones do
+    located = rng.random() < 0.75
+    return dict(
+        title=f"{words[0].title()} {words[1]} {words[2]} {i}", business_name=f"Business {i}",
+        availability="Available", business_type=rng.choice(["Shop", "Company", "Franchise"]),
+        industry=rng.sample(INDUSTRIES, rng.randint(1, 2)), label=rng.sample(LABELS, rng.randint(0, 2)),
+        foundation_date=date(2000, 1, 1) + timedelta(days=rng.randrange(9000)),
+        number_of_partners=rng.randint(1, 4), location=location, address=f"{rng.randint(1, 999)} Road",
+        business_situs=rng.choice(["Ground Floor", "Shopping mall", "Industrial Building"]),
+        business_situs_owner_type="Owner", size=float(rng.randint(100, 5000)),
+        price=round(rng.uniform(50_000, 5_000_000), -3), min_price=0.0, price_include_inventory=rng.random() < 0.5,
+        deposit=0.0, first_installment=0.0, profit=profit, turnover=turnover, rent=round(rng.uniform(5_000, 200_000), -2),
+        renewal_rent=0.0, merchandise_cost=0.0, electricity_bill=round(rng.uniform(500, 20_000), -1),
+        water_bill=round(rng.uniform(100, 3_000), -1), management_fee=round(rng.uniform(0, 10_000), -1),
+        air_conditioning_fee=0.0, rates_and_government_rent=round(rng.uniform(0, 5_000), -1),
+        renovation_and_equipment=0.0, other_expense=0.0, number_of_staff=rng.randint(0, 30),
+        staff_salary=round(rng.uniform(0, 300_000), -2), staff_remain="Yes", mpf=0.0,
+        main_product_service=[words[1]], main_product_service_percentage=[100.0], business_hours="9:00-21:00",
+        license=[], lease_term=float(rng.randint(1, 6)), lease_expiry_date=date(2026, 1, 1) + timedelta(days=rng.randrange(1500)),
+        transfer_method=["Full transfer"], reason=["Retirement"], involvement=[rng.choice(INVOLVEMENT)],
+        agent="Agent", client_name=f"Client {i}", mobile=f"{rng.randint(50_000_000, 99_999_999)}",
+        email=f"owner{i}@example.com", meeting_location="Office",
+        description=[" ".join(rng.choices(WORDS, k=12))],
+        latitude=round(rng.uniform(22.2, 22.5), 6) if located else None,
+        longitude=round(rng.uniform(113.9, 114.3), 6) if located else None,
+    )
+
+def generate_listings(count: int, seed: int, chunk_size: int) -> float:
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for first in range(0, count, chunk_size):
+        chunk = [
+            (i, schemas.BusinessListingCreate.model_validate(make_listing(rng, i)))
+            for i in range(first, min(first + chunk_size, count))
+        ]
+        with SessionLocal() as db:
+            _, errors = insert_chunk(db, chunk)
+            if errors:
+                raise RuntimeError(f"Generated listings failed to insert: {errors[:3]}")
+            db.commit()
+    return time.perf_counter() - started
+
+def generate_conversations(count: int, users: int, days: int, seed: int, chunk_size: int) -> float:
+    rng = random.Random(seed + 1)
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    with get_engine().begin() as conn:
+        for first in range(0, count, chunk_size):
+            rows = [
+                {
+                    "user_email": f"user{rng.randrange(users)}@example.com",
+                    "message": rng.choice(CHAT_LINES),
+                    "sender": "user" if rng.random() < 0.6 else "Admin",
+                    "timestamp": now - timedelta(seconds=rng.uniform(0, days * 86400)),
+                }
+                for _ in range(min(chunk_size, count - first))
+            ]
+            conn.execute(insert(models.Conversation), rows)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=parse_size, default=SIZES["10k"], help="row count, or one of 10k/100k/1m")
+    parser.add_argument("--conversations", type=parse_size, default=SIZES["10k"], help="row count, or one of 10k/100k/1m")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    migrate()
+    listing_s = generate_listings(args.listings, args.seed, args.chunk_size)
+    conversation_s = generate_conversations(args.conversations, args.users, args.days, args.seed, args.chunk_size * 10)
+    write_report({
+        "database": get_engine().url.render_as_string(hide_password=True),
+        "listings": args.listings,
+        "listings_per_second": round(args.listings / listing_s) if listing_s else None,
+        "conversations": args.conversations,
+        "conversations_per_second": round(args.conversations / conversation_s) if conversation_s else None,
+    })
+
+if __name__ == "__main__":
+    main()
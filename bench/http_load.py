@@ -0,0 +1,127 @@
+"""
+HTTP load scenarios for the listing and chat read endpoints.
+
+Each scenario runs --concurrency workers issuing requests back to back for
+--duration seconds and reports latency percentiles and throughput. Request
+parameters are drawn from a seeded generator, so two runs against the same
+data send the same mix. Without --url the app is started locally under
+uvicorn against whatever database the environment configures; fill it first
+with bench.datagen.
+
+    SQLITE_PATH=/tmp/bench.db python -m bench.http_load --concurrency 16 --duration 10
+"""
+import argparse
+import asyncio
+import random
+import time
+from contextlib import nullcontext
+import httpx
+from bench.common import latency_summary, local_server, write_report
+from bench.datagen import INDUSTRIES, LOCATIONS, WORDS
+
+SORTS = [None, "price", "-price", "-turnover", "profit_margin", "payback"]
+
+def search_request(rng: random.Random, ref_ids: list):
+    params = {"limit": 20}
+    choice = rng.random()
+    if choice < 0.3:
+        params["q"] = rng.choice(WORDS)
+    elif choice < 0.5:
+        params["keyword"] = rng.choice(WORDS)
+    if rng.random() < 0.5:
+        params["location"] = rng.choice(LOCATIONS)
+    if rng.random() < 0.3:
+        params["industry"] = rng.choice(INDUSTRIES)
+    if rng.random() < 0.4:
+        low = rng.choice([100_000, 500_000, 1_000_000])
+        params.update(min_price=low, max_price=low * 3)
+    sort = rng.choice(SORTS)
+    if sort:
+        params["sort"] = sort
+    return "/api/py/businesses/search", params
+
+def listings_request(rng: random.Random, ref_ids: list):
+    return "/api/py/businesses", {"limit": 20, "skip": rng.randrange(0, 200, 20)}
+
+def info_request(rng: random.Random, ref_ids: list):
+    return f"/api/py/businesses_info/{rng.choice(ref_ids)}", None
+
+def latest_chats_request(rng: random.Random, ref_ids: list):
+    return "/api/py/latest-chats", {"limit": rng.choice([10, 20, 50]), "limit_messages": 5}
+
+SCENARIOS = {
+    "search": search_request,
+    "listings": listings_request,
+    "info": info_request,
+    "latest_chats": latest_chats_request,
+}
+
+async def sample_ref_ids(client: httpx.AsyncClient, count: int) -> list:
+    response = await client.get("/api/py/businesses", params={"limit": count, "fields": "ref_id"})
+    response.raise_for_status()
+    ref_ids = [item["ref_id"] for item in response.json()]
+    if not ref_ids:
+        raise SystemExit("No listings to load-test; run python -m bench.datagen first")
+    return ref_ids
+
+async def run_scenario(client: httpx.AsyncClient, build, args, ref_ids: list, seed: int) -> dict:
+    samples, errors = [], 0
+
+    async def worker(rng: random.Random, deadline: float, record: bool):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            path, params = build(rng, ref_ids)
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if not record:
+                continue
+            if ok:
+                samples.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    for warmup, duration in ((True, args.warmup), (False, args.duration)):
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(random.Random(seed * 1000 + i), deadline, not warmup) for i in range(args.concurrency)
+        ])
+    return latency_summary(samples, time.perf_counter() - started, errors)
+
+async def run(args, base_url: str) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        ref_ids = await sample_ref_ids(client, args.sample)
+        results = {}
+        for i, name in enumerate(args.scenario or SCENARIOS):
+            results[name] = await run_scenario(client, SCENARIOS[name], args, ref_ids, args.seed + i)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server; default starts one locally")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="repeatable; default runs all")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--sample", type=int, default=500, help="ref ids to draw info requests from")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with (nullcontext(args.url) if args.url else local_server()) as base_url:
+        results = asyncio.run(run(args, base_url))
+    write_report({
+        "url": args.url or "local",
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "seed": args.seed,
+        "scenarios": results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Serialization throughput for /api/py/businesses pages.
+
+Compares the old path (to_dict + BusinessListing(**...) + FastAPI's response_model
+re-validation and JSON encoding) with the precompiled TypeAdapter path that
+validates from ORM attributes and dumps JSON bytes directly. No database is
+needed: rows are built in memory in the same shape the ORM loads them.
+
+    python -m bench.serialization --rows 100 --iterations 300
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timezone
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from api import models, schemas
+
+def make_rows(count: int) -> list:
+    rows = []
+    for i in range(count):
+        # List columns are stored JSON-encoded, exactly as create_listing writes them
+        rows.append(models.BusinessListing(
+            id=i + 1, ref_id=f"WC2442300{i:04d}", title=f"Listing {i}", business_name=f"Business {i}",
+            availability="Available", creation_datetime=datetime(2024, 10, 1, 12, 0, tzinfo=timezone.utc),
+            business_type="Shop", industry=json.dumps(["Food and beverage", "Retail"]), label=json.dumps(["Hot"]),
+            foundation_date=date(2020, 1, 1), number_of_partners=2, location="Wan Chai - WC", address="1 Road",
+            business_situs="Shopping mall", business_situs_owner_type="Owner", size=500.0 + i, price=100000.0 + i,
+            min_price=90000.0, price_include_inventory=True, deposit=10000.0, first_installment=5000.0,
+            profit=20000.0, turnover=80000.0, rent=15000.0, renewal_rent=16000.0, merchandise_cost=10000.0,
+            electricity_bill=2000.0, water_bill=300.0, management_fee=1500.0, air_conditioning_fee=800.0,
+            rates_and_government_rent=900.0, renovation_and_equipment=50000.0, other_expense=500.0,
+            number_of_staff=4, staff_salary=60000.0, staff_remain="Yes", mpf=3000.0,
+            main_product_service=json.dumps(["Coffee", "Cake"]), main_product_service_percentage=json.dumps([60.0, 40.0]),
+            business_hours="9:00-21:00", license=json.dumps(["Restaurant"]), lease_term=3.0,
+            lease_expiry_date=date(2027, 1, 1), transfer_method=json.dumps(["Full transfer"]),
+            reason=json.dumps(["Retirement"]), involvement=json.dumps(["Full Time"]), agent="Agent",
+            client_name="Client", mobile="12345678", email="owner@example.com", meeting_location="Office",
+            description=json.dumps(["Busy corner shop", "Loyal customers"]),
+        ))
+    return rows
+
+response_adapter = TypeAdapter(List[schemas.BusinessListing])
+
+def legacy_page(rows: list) -> bytes:
+    businesses = [schemas.BusinessListing(**item.to_dict()) for item in rows]
+    # What FastAPI does with a response_model: validate again, encode, then json.dumps
+    validated = response_adapter.validate_python(businesses, from_attributes=True)
+    content = jsonable_encoder(response_adapter.dump_python(validated, mode="json"))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+def fast_page(rows: list) -> bytes:
+    return schemas.listing_list_adapter.dump_json(
+        schemas.listing_list_adapter.validate_python(rows, from_attributes=True)
+    )
+
+def measure(fn, rows: list, iterations: int) -> dict:
+    fn(rows)  # warm up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(rows)
+    elapsed = time.perf_counter() - started
+    return {
+        "pages_per_second": iterations / elapsed,
+        "rows_per_second": iterations * len(rows) / elapsed,
+        "ms_per_page": elapsed / iterations * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assert json.loads(legacy_page(rows)) == json.loads(fast_page(rows)), "paths must produce the same JSON"
+
+    legacy = measure(legacy_page, rows, args.iterations)
+    fast = measure(fast_page, rows, args.iterations)
+    print(json.dumps({
+        "rows_per_page": args.rows,
+        "iterations": args.iterations,
+        "legacy": legacy,
+        "fast": fast,
+        "speedup": fast["pages_per_second"] / legacy["pages_per_second"],
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
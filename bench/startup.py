@@ -0,0 +1,79 @@
+"""
+Cold start: from process launch to the first response of a fresh worker.
+
+Each run starts a new Python process that imports api.index, runs the app's
+startup and serves one request in-process, as a serverless function does on
+its first invocation. The schema is migrated once beforehand, out of band,
+the way a deploy would, and startup migration is off (DB_AUTO_MIGRATE=false)
+unless set in the environment. Reported per phase over --runs processes, in ms.
+
+    SQLITE_PATH=/tmp/bench.db python -m bench.startup --runs 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from bench.common import distribution, write_report
+
+# Runs in the child; httpx is imported first so only the app's own import is timed
+CHILD = """
+import asyncio, json, sys, time
+import httpx
+started = time.perf_counter()
+from api.index import app
+imported = time.perf_counter()
+
+async def first_request():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get(sys.argv[1])
+        return ready, time.perf_counter(), time.time(), response.status_code
+
+ready, responded, responded_at, status = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (responded - ready) * 1000,
+    "responded_at": responded_at,
+    "status": status,
+}))
+"""
+
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "launch_to_response_ms")
+
+def run_once(path: str) -> dict:
+    env = {"DB_AUTO_MIGRATE": "false", **os.environ}
+    launched = time.time()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, path], env=env, capture_output=True, text=True, check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["launch_to_response_ms"] = (timings.pop("responded_at") - launched) * 1000
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/api/py/businesses/search?limit=1", help="the first request")
+    parser.add_argument("--skip-migrate", action="store_true", help="the database is already migrated")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if not args.skip_migrate:
+        subprocess.run([sys.executable, "-m", "api.migrations"], check=True, capture_output=True)
+    runs = [run_once(args.path) for _ in range(args.runs)]
+    failed = [run["status"] for run in runs if run["status"] >= 400]
+    write_report({
+        "runs": args.runs,
+        "path": args.path,
+        "database": os.getenv("DB_TYPE", "sqlite"),
+        "failed_requests": len(failed),
+        **{phase: distribution([run[phase] for run in runs]) for phase in PHASES},
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
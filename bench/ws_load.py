@@ -0,0 +1,106 @@
+"""
+Websocket chat load: N clients and M admins on /ws/chat/{client_id} and /ws/admin.
+
+Every client sends --messages messages, each one waiting for its admin's reply
+before the next. Every admin receives every client message; the admin a client
+is assigned to (client index mod M) answers it. Reported are the round trip
+(client send to admin reply received), admin delivery (client send to each
+admin receiving it) and overall message throughput. Without --url the app is
+started locally under uvicorn; chat messages are stored as usual, so use a
+scratch database.
+
+    SQLITE_PATH=/tmp/bench.db python -m bench.ws_load --clients 50 --admins 3 --messages 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from contextlib import nullcontext
+from websockets.asyncio.client import connect
+from bench.common import latency_summary, local_server, write_report
+
+def ws_url(base_url: str, path: str) -> str:
+    return base_url.replace("http://", "ws://", 1).replace("https://", "wss://", 1) + path
+
+async def admin(base_url: str, index: int, args, delivery: list, ready: asyncio.Event, done: asyncio.Event):
+    async with connect(ws_url(base_url, "/ws/admin")) as websocket:
+        ready.set()
+        receiving = asyncio.create_task(_admin_loop(websocket, index, args, delivery))
+        await done.wait()
+        receiving.cancel()
+
+async def _admin_loop(websocket, index: int, args, delivery: list):
+    async for raw in websocket:
+        data = json.loads(raw)
+        if data.get("type") != "message" or data.get("sender") != "user":
+            continue
+        # Content is "<client index>:<sequence>:<perf_counter at send>"
+        client_index, _, sent = data["content"].split(":")
+        delivery.append((time.perf_counter() - float(sent)) * 1000)
+        if int(client_index) % args.admins == index:
+            await websocket.send(json.dumps({"type": "admin_message", "client": data["client"], "content": data["content"]}))
+
+async def client(base_url: str, index: int, args, round_trips: list, failures: list):
+    client_id = f"bench-{args.seed}-{index}"
+    async with connect(ws_url(base_url, f"/ws/chat/{client_id}")) as websocket:
+        for sequence in range(args.messages):
+            sent = time.perf_counter()
+            content = f"{index}:{sequence}:{sent!r}"
+            await websocket.send(json.dumps({"content": content, "sender": "user"}))
+            try:
+                async with asyncio.timeout(args.timeout):
+                    while True:
+                        data = json.loads(await websocket.recv())
+                        if data.get("sender") == "Admin" and data.get("content") == content:
+                            break
+            except TimeoutError:
+                failures.append(content)
+                continue
+            round_trips.append((time.perf_counter() - sent) * 1000)
+
+async def run(args, base_url: str) -> dict:
+    round_trips, delivery, failures = [], [], []
+    done = asyncio.Event()
+    readies = [asyncio.Event() for _ in range(args.admins)]
+    admins = [asyncio.create_task(admin(base_url, i, args, delivery, readies[i], done)) for i in range(args.admins)]
+    await asyncio.gather(*[ready.wait() for ready in readies])
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client(base_url, i, args, round_trips, failures) for i in range(args.clients)])
+    elapsed = time.perf_counter() - started
+    sent = args.clients * args.messages
+    # Replies can overtake the copies still on their way to the other admins
+    deadline = time.perf_counter() + args.timeout
+    while len(delivery) < sent * args.admins and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    done.set()
+    await asyncio.gather(*admins)
+
+    return {
+        "clients": args.clients,
+        "admins": args.admins,
+        "messages_sent": sent,
+        "messages_per_second": round(sent / elapsed, 1),
+        "round_trip": latency_summary(round_trips, elapsed, len(failures)),
+        "admin_delivery": latency_summary(delivery, elapsed, sent * args.admins - len(delivery)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server; default starts one locally")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--messages", type=int, default=20, help="messages per client")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for each reply")
+    parser.add_argument("--seed", type=int, default=42, help="namespaces the client ids of this run")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    if args.admins < 1:
+        parser.error("--admins must be at least 1")
+
+    with (nullcontext(args.url) if args.url else local_server()) as base_url:
+        result = asyncio.run(run(args, base_url))
+    write_report({"url": args.url or "local", **result}, args.output)
+
+if __name__ == "__main__":
+    main()
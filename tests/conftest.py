@@ -0,0 +1,32 @@
+import os
+import random
+import tempfile
+import pytest
+from fastapi.testclient import TestClient
+
+# Point the app at a scratch SQLite file before anything imports api.database
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+os.environ.setdefault("DB_AUTO_MIGRATE", "false")
+
+@pytest.fixture(scope="session")
+def client():
+    from api.index import app
+    from api.migrations import migrate
+    migrate()
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def new_listing(client):
+    """Create a listing through the API and return its JSON."""
+    from bench.datagen import make_listing
+    rng = random.Random(0)
+
+    def create(i: int = 0) -> dict:
+        body = make_listing(rng, i)
+        body["foundation_date"] = body["foundation_date"].isoformat()
+        body["lease_expiry_date"] = body["lease_expiry_date"].isoformat()
+        response = client.post("/api/py/businesses", json=body)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return create
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import pytest
+from api import broker
+from api.broker import Broker, LocalBroker, LocalHub, RedisBroker
+from api.connections import ConnectionManager
+
+class FakePubSub:
+    """Stands in for a redis PubSub; events are queued, an exception drops the connection."""
+
+    def __init__(self):
+        self.events = asyncio.Queue()
+        self.patterns = []
+
+    async def psubscribe(self, pattern):
+        self.patterns.append(pattern)
+
+    async def listen(self):
+        while True:
+            event = await self.events.get()
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    async def aclose(self):
+        pass
+
+class FakeRedis:
+    def __init__(self):
+        self.pubsubs = []
+
+    def pubsub(self):
+        self.pubsubs.append(FakePubSub())
+        return self.pubsubs[-1]
+
+    async def aclose(self):
+        pass
+
+def fake_broker() -> RedisBroker:
+    # Skips __init__, which needs the redis package
+    redis_broker = RedisBroker.__new__(RedisBroker)
+    redis_broker.redis, redis_broker.prefix = FakeRedis(), "test:"
+    redis_broker.pubsub = redis_broker.task = None
+    return redis_broker
+
+def message(channel: str, payload: dict) -> dict:
+    return {"type": "pmessage", "channel": f"test:{channel}".encode(), "data": json.dumps(payload)}
+
+async def resubscribe_after_drop():
+    received = []
+
+    async def handler(channel, payload):
+        received.append((channel, payload))
+
+    redis_broker = fake_broker()
+    await redis_broker.start(handler)
+    first = redis_broker.redis.pubsubs[0]
+    await first.events.put(message("admin", {"n": 1}))
+    await first.events.put(ConnectionError("Connection reset by peer"))
+    while len(redis_broker.redis.pubsubs) < 2:
+        await asyncio.sleep(0.001)
+    second = redis_broker.redis.pubsubs[1]
+    await second.events.put(message("client:a", {"n": 2}))
+    while len(received) < 2:
+        await asyncio.sleep(0.001)
+    await redis_broker.stop()
+    return received, second.patterns
+
+def test_redis_listener_resubscribes_after_connection_drop(monkeypatch):
+    monkeypatch.setattr(broker, "CHAT_BROKER_RETRY_MIN_S", 0.001)
+    received, patterns = asyncio.run(asyncio.wait_for(resubscribe_after_drop(), 5))
+    assert received == [("admin", {"n": 1}), ("client:a", {"n": 2})]
+    assert patterns == ["test:*"]
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = asyncio.Queue()
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        await self.sent.put(message)
+
+    async def send_text(self, message):
+        await self.sent.put(message)
+
+    async def close(self):
+        pass
+
+def test_broker_requires_start_and_publish():
+    class Incomplete(Broker):
+        async def start(self, handler):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+async def fan_out_between_workers():
+    # Two workers attached to one bus, as two processes would be to Redis
+    hub = LocalHub()
+    client_worker, admin_worker = ConnectionManager(LocalBroker(hub)), ConnectionManager(LocalBroker(hub))
+    client_socket, admin_socket = FakeWebSocket(), FakeWebSocket()
+    await admin_worker.connect_admin(admin_socket)
+    await client_worker.connect(client_socket, "client-1")
+    new_chat = await asyncio.wait_for(admin_socket.sent.get(), 1)
+
+    # An admin on one worker answers a client whose socket is held by the other
+    await admin_worker.send_to_client("client-1", {"sender": "Admin", "content": "Hello"})
+    reply = await asyncio.wait_for(client_socket.sent.get(), 1)
+    await client_worker.stop()
+    await admin_worker.stop()
+    return new_chat, reply
+
+def test_local_hub_fans_out_between_connection_managers():
+    new_chat, reply = asyncio.run(fan_out_between_workers())
+    assert new_chat == {"type": "new_chat", "client": "client-1"}
+    assert reply == {"sender": "Admin", "content": "Hello"}
@@ -0,0 +1,36 @@
+import csv
+import io
+
+def exported_csv(client, new_listing) -> str:
+    """Header and one row for a new listing, as the CSV export writes them."""
+    ref_id = new_listing()["ref_id"]
+    rows = list(csv.reader(io.StringIO(client.get("/api/py/businesses/export", params={"format": "csv"}).text)))
+    header, row = rows[0], next(row for row in rows[1:] if ref_id in row)
+    row[header.index("title")] = "Café crème"
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([header, row, row])
+    return buffer.getvalue()
+
+def upload(client, body: bytes):
+    return client.post("/api/py/businesses/bulk", content=body, headers={"content-type": "text/csv"})
+
+def test_non_utf8_rows_are_reported_by_line(client, new_listing):
+    header, first, second = exported_csv(client, new_listing).splitlines()
+    body = f"{header}\n{first}\n".encode() + f"{second}\n".encode("latin-1")
+    response = upload(client, body)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 1
+    assert [(error["line"], error["errors"][0]["msg"]) for error in report["errors"]] == [
+        (3, "Line is not valid UTF-8; uploads must be UTF-8 encoded"),
+    ]
+
+def test_utf16_and_non_utf8_header_are_rejected(client, new_listing):
+    text = exported_csv(client, new_listing)
+    assert upload(client, text.encode("utf-16")).status_code == 400
+    assert upload(client, "Títle\n".encode("latin-1") + text.encode()).status_code == 400
+
+def test_utf8_byte_order_mark_is_ignored(client, new_listing):
+    response = upload(client, exported_csv(client, new_listing).encode("utf-8-sig"))
+    assert response.status_code == 200
+    assert (response.json()["inserted"], response.json()["errors"]) == (2, [])
@@ -0,0 +1,49 @@
+from api.cache import MemoryBackend, ResponseCache, check_shared
+
+def test_build_overlapping_an_invalidation_is_not_cached():
+    cache = ResponseCache(MemoryBackend())
+    versions = iter([b"v1", b"v2"])
+
+    def build_during_update():
+        # The build read the old row, then the update commits and invalidates
+        value = next(versions)
+        cache.invalidate("listing:A")
+        return value
+
+    assert cache.get_or_build("listing:A", ["listing:A"], build_during_update) == b"v1"
+    assert cache.get_or_build("listing:A", ["listing:A"], lambda: next(versions)) == b"v2"
+    assert cache.get_or_build("listing:A", ["listing:A"], lambda: b"unused") == b"v2"
+    assert cache.stats()["stale_builds"] == 1
+
+def test_batch_build_overlapping_an_invalidation_skips_only_invalidated_keys():
+    cache = ResponseCache(MemoryBackend())
+
+    def build(keys):
+        cache.invalidate("listing:A")
+        return {key: b"old " + key.encode() for key in keys}
+
+    cache.get_or_build_many(["A", "B"], lambda key: [f"listing:{key}"], build)
+    assert cache.backend.get("A") is None
+    assert cache.backend.get("B") == b"old B"
+
+def test_unrelated_invalidation_keeps_the_build():
+    cache = ResponseCache(MemoryBackend())
+
+    def build():
+        cache.invalidate("listing:B")
+        return b"A"
+
+    cache.get_or_build("listing:A", ["listing:A"], build)
+    assert cache.backend.get("listing:A") == b"A"
+
+def test_memory_backend_warns_under_multiple_workers(monkeypatch, caplog):
+    cache = ResponseCache(MemoryBackend())
+    monkeypatch.delenv("VERCEL", raising=False)
+    monkeypatch.delenv("CHAT_BROKER", raising=False)
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    check_shared(cache)
+    assert not caplog.records
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    check_shared(cache)
+    assert "WEB_CONCURRENCY=4" in caplog.text
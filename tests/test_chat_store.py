@@ -0,0 +1,41 @@
+import asyncio
+from datetime import datetime
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from api import models
+from api.chat_store import MessageWriter
+
+def reject_aware_datetimes(orm_execute_state):
+    # asyncpg refuses aware datetimes for naive columns; SQLite would store them silently
+    params = orm_execute_state.parameters
+    for row in params if isinstance(params, list) else [params or {}]:
+        for name, value in row.items():
+            if isinstance(value, datetime) and value.tzinfo is not None:
+                raise TypeError(f"{name} is timezone-aware")
+
+async def write_and_read(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all, tables=[models.Conversation.__table__])
+
+    def session_factory():
+        db = AsyncSession(engine)
+        event.listen(db.sync_session, "do_orm_execute", reject_aware_datetimes)
+        return db
+
+    # "commit" durability makes write() raise when the flush holding the message fails
+    writer = MessageWriter(session_factory=session_factory, durability="commit", flush_interval_ms=1)
+    await writer.write("user@example.com", "Is this still available?", "user")
+    await writer.write("user@example.com", "Yes", "Admin")
+    await writer.stop()
+
+    async with AsyncSession(engine) as db:
+        rows = (await db.execute(
+            select(models.Conversation.sender, models.Conversation.message).order_by(models.Conversation.id)
+        )).all()
+    await engine.dispose()
+    return rows
+
+def test_messages_are_flushed(tmp_path):
+    rows = asyncio.run(write_and_read(tmp_path / "chat.db"))
+    assert rows == [("user", "Is this still available?"), ("Admin", "Yes")]
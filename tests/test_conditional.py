@@ -0,0 +1,25 @@
+from starlette.requests import Request
+from api import conditional
+
+def request_with(if_match: str) -> Request:
+    return Request({"type": "http", "headers": [(b"if-match", if_match.encode())]})
+
+def test_full_listing_etag_is_strong():
+    assert conditional.listing_validators(7, 3, None, strong=True).etag == '"7.3"'
+    assert conditional.listing_validators(7, 3, None).etag == 'W/"7.3"'
+
+def test_if_match_uses_strong_comparison():
+    assert conditional.if_match_versions(request_with('"7.3"')) == [(7, 3)]
+    assert conditional.if_match_versions(request_with('W/"7.3", "8.1"')) == [(8, 1)]
+    assert conditional.if_match_versions(request_with('W/"7.3"')) == []
+    assert conditional.if_match_versions(request_with("*")) is None
+
+def test_full_listing_is_not_held_by_shared_caches(client, new_listing):
+    ref_id = new_listing()["ref_id"]
+    full = client.get(f"/api/py/businesses/{ref_id}")
+    assert full.headers["cache-control"] == conditional.EDITABLE_CACHE_CONTROL
+    assert not full.headers["etag"].startswith("W/")
+    projection = client.get(f"/api/py/businesses/{ref_id}", params={"fields": "ref_id,price"})
+    assert projection.headers["cache-control"] == conditional.LISTING_CACHE_CONTROL
+    info = client.get(f"/api/py/businesses_info/{ref_id}")
+    assert info.headers["cache-control"] == conditional.LISTING_CACHE_CONTROL
@@ -0,0 +1,16 @@
+from api import geo
+
+def test_prefix_end_carries_past_z():
+    assert geo.prefix_end("wecn") == "wecp"
+    assert geo.prefix_end("we9") == "web"
+    assert geo.prefix_end("wez") == "wf"
+    assert geo.prefix_end("wzz") == "x"
+    assert geo.prefix_end("zz") is None
+
+def test_prefix_end_bounds_every_hash_in_cell():
+    hashes = [geo.encode(22.28 + i * 0.001, 114.15 + i * 0.001) for i in range(50)]
+    for precision in range(1, geo.GEOHASH_PRECISION + 1):
+        for prefix in {h[:precision] for h in hashes}:
+            end = geo.prefix_end(prefix)
+            inside = [h for h in hashes if prefix <= h < end]
+            assert inside == [h for h in hashes if h.startswith(prefix)]
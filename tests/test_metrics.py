@@ -0,0 +1,20 @@
+import pytest
+from sqlalchemy import Column, Date, Integer, MetaData, Table, create_engine, insert, text
+from sqlalchemy.exc import DBAPIError, StatementError
+from api import metrics
+
+def test_failed_statements_do_not_leak_start_times():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine, "test")
+    metadata = MetaData()
+    table = Table("t", metadata, Column("id", Integer, primary_key=True), Column("day", Date))
+    metadata.create_all(engine)
+    with engine.connect() as conn:
+        with pytest.raises(DBAPIError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        # Fails while binding parameters, before the cursor runs
+        with pytest.raises(StatementError):
+            conn.execute(insert(table), {"day": "not a date"})
+        assert conn.info["query_started"] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_started"] == []
@@ -0,0 +1,49 @@
+import json
+from datetime import date, datetime, timezone
+from sqlalchemy import MetaData, Table, create_engine, func, insert, select
+from api import models
+from api.migrations import migrate, pending_migrations
+
+# Columns the original schema did not have; later migrations add them
+ADDED_LISTING_COLUMNS = {"updated_at", "version", "latitude", "longitude"}
+
+def baseline_listing(i: int) -> dict:
+    lists = {name: json.dumps(["Food and beverage"]) for name in (
+        "industry", "label", "main_product_service", "license", "transfer_method",
+        "reason", "involvement", "description",
+    )}
+    return {
+        **lists, "main_product_service_percentage": json.dumps([100.0]),
+        "ref_id": f"WC2441{i:05d}", "title": f"Cafe {i}", "business_name": f"Biz {i}",
+        "location": "Wan Chai - WC", "creation_datetime": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "foundation_date": date(2020, 1, 1), "price": 1000.0 * i, "profit": 100.0 * i,
+        "turnover": 500.0 * i, "rent": 10.0, "size": 100.0, "number_of_staff": 2,
+    }
+
+def create_baseline_db(path) -> object:
+    engine = create_engine(f"sqlite:///{path}")
+    metadata = MetaData()
+    listings = Table("business_listings", metadata, *[
+        column.copy() for column in models.BusinessListing.__table__.columns
+        if column.name not in ADDED_LISTING_COLUMNS
+    ])
+    Table("conversations", metadata, *[column.copy() for column in models.Conversation.__table__.columns])
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(listings), [baseline_listing(i) for i in range(1, 6)])
+    return engine
+
+def test_migrates_populated_baseline_database(tmp_path):
+    engine = create_baseline_db(tmp_path / "baseline.db")
+
+    migrate(engine)
+
+    assert pending_migrations(engine) == []
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(models.ListingCard)).scalar() == 5
+        assert conn.execute(select(func.count()).select_from(models.ListingFacet)).scalar() > 0
+        versions = conn.execute(select(models.BusinessListing.version, models.BusinessListing.updated_at)).all()
+        cards = conn.execute(select(models.ListingCard.district_code, models.ListingCard.geohash)).all()
+    assert all(version == 1 and updated_at is not None for version, updated_at in versions)
+    # latitude/longitude arrive with migration 8, after the card backfill of migration 7 read them
+    assert cards == [("WC", None)] * 5
@@ -0,0 +1,11 @@
+import logging
+import pytest
+
+@pytest.mark.parametrize("path", [
+    "/api/py/businesses", "/api/py/businesses/search", "/api/py/businesses_items", "/api/py/conversations/a@example.com",
+])
+def test_malformed_cursor_is_a_client_error(client, caplog, path):
+    with caplog.at_level(logging.ERROR, logger="api.database"):
+        response = client.get(path, params={"cursor": "not-a-cursor", "before": "not-a-cursor"})
+    assert response.status_code == 400
+    assert not caplog.records
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, insert, select
+from api import models
+from api.migrations import migrate
+from api.retention import archive_conversations
+
+def add_messages(engine, *messages: str):
+    old = (datetime.now(timezone.utc) - timedelta(days=200)).replace(tzinfo=None)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Conversation), [
+            {"user_email": "user@example.com", "message": message, "sender": "user", "timestamp": old}
+            for message in messages
+        ])
+
+def test_archives_again_after_live_ids_are_reused(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    migrate(engine)
+    add_messages(engine, "first", "second")
+    assert archive_conversations(engine, days=90) == 2
+
+    # The emptied live table hands out the archived ids again
+    add_messages(engine, "third")
+    assert archive_conversations(engine, days=90) == 1
+
+    archive = models.ConversationArchive
+    with engine.connect() as conn:
+        rows = conn.execute(select(archive.source_id, archive.message).order_by(archive.id)).all()
+    assert rows == [(1, "first"), (2, "second"), (1, "third")]
@@ -0,0 +1,47 @@
+import random
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from api import bulk, models, schemas
+from api.migrations import migrate
+from api.ref_ids import reserve
+from bench.datagen import make_listing
+
+def chunk(*numbers: int) -> list:
+    rng = random.Random(0)
+    return [(i, schemas.BusinessListingCreate.model_validate(make_listing(rng, i))) for i in numbers]
+
+@pytest.fixture(params=[True, False], ids=["returning", "no-returning"])
+def engine(request, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'listings.db'}")
+    migrate(engine)
+    if not request.param:
+        # What SQLite before 3.35 reports
+        engine.dialect.insert_returning = False
+        engine.dialect.insert_executemany_returning = False
+        engine.dialect.update_returning = False
+    yield engine
+    engine.dispose()
+
+def test_reserve_counts_up_per_scope(engine):
+    with Session(engine) as db:
+        assert [reserve(db, "WC"), reserve(db, "WC", 3), reserve(db, "CL"), reserve(db, "WC")] == [1, 4, 1, 5]
+
+def test_insert_chunk_returns_ids(engine):
+    with Session(engine) as db:
+        assert bulk.insert_chunk(db, chunk(1, 2, 3)) == (3, [])
+        db.commit()
+        assert db.execute(select(func.count()).select_from(models.ListingCard)).scalar_one() == 3
+
+def test_insert_chunk_reports_conflicting_rows(engine, monkeypatch):
+    def fixed_ref_ids(db, rows):
+        for row, ref_id in zip(rows, ["A-1", "A-2", "A-1"]):
+            row["ref_id"] = ref_id
+
+    monkeypatch.setattr(bulk, "assign_ref_ids", fixed_ref_ids)
+    with Session(engine) as db:
+        inserted, errors = bulk.insert_chunk(db, chunk(1, 2, 3))
+        db.commit()
+        assert inserted == 2
+        assert [error["line"] for error in errors] == [3]
+        assert db.execute(select(func.count()).select_from(models.ListingCard)).scalar_one() == 2